@@ -0,0 +1,87 @@
+"""
+Benchmark: calculate_purchase_batch vs. calling calculate_purchase_for_cycle per row.
+
+Builds a synthetic registry with realistic repetition (a few dozen allotment
+values, a year of start dates), checks that every batch row matches the scalar
+function, and reports rows/sec for both paths.
+
+Usage:
+    python benchmarks/bench_batch.py                  # 10k, 1M and 10M rows
+    python benchmarks/bench_batch.py --sizes 10000 100000
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reup_calculator import calculate_purchase_batch, calculate_purchase_for_cycle
+
+# Rows above this size are only timed on the batch path; the scalar loop is
+# timed on a prefix and extrapolated, otherwise a 10M run takes far too long.
+SCALAR_SAMPLE_ROWS = 200_000
+AS_OF = datetime.date(2025, 6, 1)
+
+
+def make_registry(row_count, as_of, seed=35):
+    rng = random.Random(seed)
+    allotments = [round(0.25 * step, 2) for step in range(1, 41)]
+    start_dates = [(as_of - datetime.timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(-30, 365)]
+    return (
+        [rng.choice(allotments) for _ in range(row_count)],
+        [rng.choice(start_dates) for _ in range(row_count)],
+    )
+
+
+def check_rows(allotments_oz, start_date_strs, columns, sample_rows, as_of):
+    for row in sample_rows:
+        expected = calculate_purchase_for_cycle(allotments_oz[row], start_date_strs[row], as_of)
+        if "error" in expected:
+            assert columns["errors"][row] == expected["error"], row
+            continue
+        assert row not in columns["errors"], row
+        assert columns["total_purchasable_units"][row] == expected["total_purchasable_units"], row
+        assert columns["total_allotment_grams"][row] == expected["total_allotment_grams"], row
+        assert columns["grams_leftover_at_end_of_cycle"][row] == expected["grams_leftover_at_end_of_cycle"], row
+        for week in expected["full_5_week_plan"]:
+            assert columns["weekly_units"][week["week"] - 1][row] == week["units_to_buy"], row
+            assert columns["weekly_grams"][week["week"] - 1][row] == week["grams_to_buy"], row
+        current = expected["current_week_recommendation"]
+        assert columns["current_week"][row] == (current["week"] if current else 0), row
+
+
+def run(row_count, as_of):
+    allotments_oz, start_date_strs = make_registry(row_count, as_of)
+
+    started = time.perf_counter()
+    columns = calculate_purchase_batch(allotments_oz, start_date_strs, as_of)
+    batch_seconds = time.perf_counter() - started
+
+    scalar_rows = min(row_count, SCALAR_SAMPLE_ROWS)
+    started = time.perf_counter()
+    for row in range(scalar_rows):
+        calculate_purchase_for_cycle(allotments_oz[row], start_date_strs[row], as_of)
+    scalar_seconds = (time.perf_counter() - started) * row_count / scalar_rows
+
+    check_rows(allotments_oz, start_date_strs, columns, range(min(row_count, 10_000)), as_of)
+
+    estimated = " (extrapolated)" if scalar_rows < row_count else ""
+    print(f"{row_count:>11,} rows | batch {batch_seconds:8.3f}s ({row_count / batch_seconds:12,.0f} rows/s)"
+          f" | scalar {scalar_seconds:8.3f}s{estimated} | speedup {scalar_seconds / batch_seconds:5.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--as-of", type=datetime.date.fromisoformat, default=AS_OF, metavar="YYYY-MM-DD",
+                        help=f"Fixed as-of date so runs are reproducible (default {AS_OF}).")
+    args = parser.parse_args(argv)
+    for row_count in args.sizes:
+        run(row_count, args.as_of)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: population demand forecast from bucketed patient counts.
+
+Counts a synthetic registry into a DemandForecast, forecasts daily and weekly
+demand, and reports the time for each step and the number of buckets, which
+is what the forecast's memory and time scale with. A sample of patients is
+then forecast one by one, by expanding each plan day by day, and compared
+with a forecast built from the same sample.
+
+Usage:
+    python benchmarks/bench_forecast.py
+    python benchmarks/bench_forecast.py --patients 1000000 --days 365 --no-rollover
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reup_calculator import plan_cycle
+from reup_forecast import DemandForecast
+
+FIRST_DAY = datetime.date(2025, 6, 1)
+
+
+def make_registry(patient_count, seed=35):
+    rng = random.Random(seed)
+    allotments = [round(0.25 * step, 2) for step in range(1, 41)]
+    start_dates = [(FIRST_DAY - datetime.timedelta(days=offset)).isoformat() for offset in range(-30, 365)]
+    return ([rng.choice(allotments) for _ in range(patient_count)],
+            [rng.choice(start_dates) for _ in range(patient_count)])
+
+
+def naive_daily_demand(allotments_oz, start_date_strs, days, rollover):
+    """Expands every patient's plan onto the calendar, one cycle at a time."""
+    first_ordinal = FIRST_DAY.toordinal()
+    demand = [0] * days
+    for total_allotment_oz, start_date_str in zip(allotments_oz, start_date_strs):
+        plan = plan_cycle(total_allotment_oz, start_date_str, FIRST_DAY)
+        rules = plan.rule_set
+        cycle_start = datetime.date.fromisoformat(start_date_str).toordinal() - first_ordinal
+        while cycle_start < days:
+            for week, units_to_buy, _ in plan.weekly_plan:
+                day = cycle_start + (week - 1) * rules.days_in_week
+                if 0 <= day < days:
+                    demand[day] += units_to_buy
+            if not rollover:
+                break
+            cycle_start += rules.period_days
+    return demand
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=10_000_000)
+    parser.add_argument("--days", type=int, default=182, help="Days to forecast (default 182).")
+    parser.add_argument("--no-rollover", action="store_true", help="Forecast each patient's current cycle only.")
+    parser.add_argument("--check", type=int, default=20_000, help="Patients compared with the naive forecast.")
+    args = parser.parse_args(argv)
+    rollover = not args.no_rollover
+
+    allotments_oz, start_date_strs = make_registry(args.patients)
+
+    forecast = DemandForecast(rollover=rollover)
+    started = time.perf_counter()
+    forecast.add_patients(allotments_oz, start_date_strs)
+    add_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    daily = forecast.daily_demand(FIRST_DAY, args.days)
+    daily_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    forecast.weekly_demand(FIRST_DAY, args.days // 7)
+    weekly_seconds = time.perf_counter() - started
+
+    sample = DemandForecast(rollover=rollover)
+    sample.add_patients(allotments_oz[:args.check], start_date_strs[:args.check])
+    expected = naive_daily_demand(allotments_oz[:args.check], start_date_strs[:args.check], args.days, rollover)
+    assert list(sample.daily_demand(FIRST_DAY, args.days)) == expected
+
+    print(f"{args.patients:,} patients, {forecast.bucket_count:,} buckets, {args.days} days, "
+          f"rollover {'on' if rollover else 'off'}")
+    print(f"add_patients    {add_seconds:8.3f} s ({args.patients / add_seconds:,.0f} patients/s)")
+    print(f"daily_demand    {daily_seconds * 1000:8.1f} ms")
+    print(f"weekly_demand   {weekly_seconds * 1000:8.1f} ms")
+    print(f"total units     {sum(daily):,}")
+    print(f"checked         {min(args.check, args.patients):,} patients against the naive forecast")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: rolling-window ledger queries against patients with years of history.
+
+Loads every patient's history with record_purchases, then times
+max_purchasable queries on random dates against a naive rescan of the full
+history, checking that both give the same window totals.
+
+Usage:
+    python benchmarks/bench_ledger.py
+    python benchmarks/bench_ledger.py --patients 10000 --years 10 --purchases-per-week 3
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reup_ledger import PurchaseLedger
+
+FIRST_DAY = datetime.date(2018, 1, 1)
+PRODUCT_GRAMS = (1.0, 3.5, 7.0, 14.0)
+
+
+def make_history(rng, years, purchases_per_week):
+    days = years * 365
+    count = int(days / 7 * purchases_per_week)
+    return [(FIRST_DAY + datetime.timedelta(days=rng.randrange(days)), rng.choice(PRODUCT_GRAMS))
+            for _ in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=2_000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--purchases-per-week", type=float, default=2.0)
+    parser.add_argument("--queries", type=int, default=200_000)
+    parser.add_argument("--naive-queries", type=int, default=2_000,
+                        help="Queries answered by rescanning history (slow; kept small).")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(35)
+    histories = {f"P{patient:06d}": make_history(rng, args.years, args.purchases_per_week)
+                 for patient in range(args.patients)}
+    rows = sum(len(history) for history in histories.values())
+
+    ledger = PurchaseLedger()
+    started = time.perf_counter()
+    for patient_id, history in histories.items():
+        ledger.set_allotment(patient_id, 2.5)
+        ledger.record_purchases(patient_id, history)
+    load_seconds = time.perf_counter() - started
+
+    patient_ids = list(histories)
+    span_days = args.years * 365
+    queries = [(rng.choice(patient_ids), FIRST_DAY + datetime.timedelta(days=rng.randrange(span_days)))
+               for _ in range(args.queries)]
+
+    started = time.perf_counter()
+    for patient_id, as_of in queries:
+        ledger.max_purchasable(patient_id, as_of)
+    indexed_seconds = time.perf_counter() - started
+
+    naive_queries = queries[:args.naive_queries]
+    period_days = ledger.rules.period_days
+    started = time.perf_counter()
+    naive_totals = [sum(grams for day, grams in histories[patient_id] if 0 <= (as_of - day).days < period_days)
+                    for patient_id, as_of in naive_queries]
+    naive_seconds = time.perf_counter() - started
+
+    for (patient_id, as_of), expected in zip(naive_queries, naive_totals):
+        actual = ledger.patient(patient_id).grams_purchased_in_window(as_of)
+        assert abs(actual - expected) < 1e-6, (patient_id, as_of, actual, expected)
+
+    indexed_per_query = indexed_seconds / len(queries)
+    naive_per_query = naive_seconds / len(naive_queries)
+    print(f"{args.patients:,} patients, {rows:,} purchases ({rows / args.patients:,.0f} per patient over {args.years} years)")
+    print(f"  load (record_purchases):  {load_seconds:8.3f}s  ({rows / load_seconds:,.0f} purchases/s)")
+    print(f"  indexed max_purchasable:  {indexed_per_query * 1e6:8.2f} us/query  ({len(queries):,} queries)")
+    print(f"  naive history rescan:     {naive_per_query * 1e6:8.2f} us/query  ({len(naive_queries):,} queries)")
+    print(f"  speedup:                  {naive_per_query / indexed_per_query:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: cost of the reup_metrics instrumentation, disabled and enabled.
+
+Times plan_cycle and calculate_purchase_for_cycle three ways:
+
+    uninstrumented  the function body without the metrics hooks
+    disabled        the real function with metrics off (the default)
+    enabled         the real function recording into reup_metrics
+
+and calculate_purchase_batch disabled and enabled.
+
+The variants are run interleaved and the best of every round is kept, so drift
+in machine load affects them equally. Disabled overhead should be within
+noise of the uninstrumented copy.
+
+Usage:
+    python benchmarks/bench_metrics.py
+    python benchmarks/bench_metrics.py --calls 200000 --rounds 15
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reup_metrics
+from reup_calculator import _plan_cycle, calculate_purchase_batch, calculate_purchase_for_cycle, plan_cycle
+from reup_rules import DEFAULT_RULE_SET
+
+AS_OF = datetime.date(2025, 6, 1)
+ALLOTMENT_OZ = 3.25
+START_DATE = "2025-05-20"
+
+
+def uninstrumented_calculate_purchase_for_cycle(total_allotment_oz, start_date_str, as_of=None,
+                                                rule_set=DEFAULT_RULE_SET):
+    """calculate_purchase_for_cycle as it was before instrumentation."""
+    try:
+        return _plan_cycle(total_allotment_oz, start_date_str, as_of, rule_set).to_dict()
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+def per_call_seconds(func, args, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        func(*args)
+    return (time.perf_counter() - started) / calls
+
+
+def compare(label, variants, args, calls, rounds):
+    """Times each (name, func, metrics_on) variant; overheads are relative to the first."""
+    best = {name: float("inf") for name, _, _ in variants}
+    for _ in range(rounds):
+        for name, func, metrics_on in variants:
+            if metrics_on:
+                reup_metrics.enable()
+            try:
+                best[name] = min(best[name], per_call_seconds(func, args, calls))
+            finally:
+                reup_metrics.disable()
+
+    print(label)
+    baseline = best[variants[0][0]]
+    for name, seconds in best.items():
+        print(f"  {name:<16}{seconds * 1e6:10.3f} us/call  ({seconds / baseline - 1:+.1%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50_000, help="Single calls per round (default 50,000).")
+    parser.add_argument("--batch-rows", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=9)
+    args = parser.parse_args(argv)
+
+    compare("plan_cycle",
+            [("uninstrumented", _plan_cycle, False), ("disabled", plan_cycle, False), ("enabled", plan_cycle, True)],
+            (ALLOTMENT_OZ, START_DATE, AS_OF, DEFAULT_RULE_SET), args.calls, args.rounds)
+
+    compare("calculate_purchase_for_cycle",
+            [("uninstrumented", uninstrumented_calculate_purchase_for_cycle, False),
+             ("disabled", calculate_purchase_for_cycle, False),
+             ("enabled", calculate_purchase_for_cycle, True)],
+            (ALLOTMENT_OZ, START_DATE, AS_OF), args.calls, args.rounds)
+
+    # The batch hooks run once per batch, not per row.
+    batch = ([ALLOTMENT_OZ] * args.batch_rows, [START_DATE] * args.batch_rows, AS_OF)
+    batch_calls = max(1, args.calls // args.batch_rows)
+    compare(f"calculate_purchase_batch ({args.batch_rows:,} rows)",
+            [("disabled", calculate_purchase_batch, False), ("enabled", calculate_purchase_batch, True)],
+            batch, batch_calls, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark: multi-size optimizer vs. brute force, and cached throughput.
+
+For small allotments, every combination of product counts per week is
+enumerated and the least leftover found; the optimizer must match it exactly.
+Then the optimizer is timed cold (empty caches) and cached across a patient
+base that repeats a few dozen allotments.
+
+Usage:
+    python benchmarks/bench_optimizer.py
+    python benchmarks/bench_optimizer.py --patients 1000000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reup_calculator import ALLOTMENT_PERIOD_WEEKS, OUNCES_TO_GRAMS
+from reup_optimizer import (DEFAULT_CATALOG_GRAMS, optimize_purchase_for_cycle, optimizer_cache_clear,
+                            optimizer_cache_info)
+
+# Small enough that brute force finishes: allotment in oz, weekly caps in grams.
+BRUTE_FORCE_CASES = [
+    (0.25, None), (0.5, None), (0.75, None), (1.0, None),
+    (0.5, (3.0, 3.0, 3.0, 3.0, 3.0)), (0.75, (5.0, 4.0, 4.0, 4.0, 4.0)), (1.0, (7.0, 5.0, 5.0, 5.0, 5.0)),
+]
+
+
+def brute_force_leftover(total_allotment_oz, catalog_grams, weekly_caps_grams):
+    """Smallest leftover over every per-week combination of product counts, in tenths of a gram."""
+    allotment = int(total_allotment_oz * OUNCES_TO_GRAMS * 10 + 1e-9)
+    sizes = [round(size * 10) for size in catalog_grams]
+    caps = [allotment] * ALLOTMENT_PERIOD_WEEKS if weekly_caps_grams is None else \
+        [int(cap * 10 + 1e-9) for cap in weekly_caps_grams]
+
+    def week_totals(cap):
+        totals = set()
+        for counts in itertools.product(*(range(min(cap, allotment) // size + 1) for size in sizes)):
+            total = sum(size * count for size, count in zip(sizes, counts))
+            if total <= cap:
+                totals.add(total)
+        return sorted(totals)
+
+    per_week = [week_totals(cap) for cap in caps]
+    if weekly_caps_grams is None:
+        # Uncapped weeks are interchangeable, so the cycle total is one combination.
+        return allotment - max(total for total in per_week[0] if total <= allotment)
+    best = 0
+    for weeks in itertools.product(*per_week):
+        total = sum(weeks)
+        if best < total <= allotment:
+            best = total
+    return allotment - best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    print("Brute force comparison (leftover grams):")
+    for total_allotment_oz, caps in BRUTE_FORCE_CASES:
+        started = time.perf_counter()
+        expected = brute_force_leftover(total_allotment_oz, DEFAULT_CATALOG_GRAMS, caps) / 10
+        brute_seconds = time.perf_counter() - started
+
+        optimizer_cache_clear()
+        started = time.perf_counter()
+        plan = optimize_purchase_for_cycle(total_allotment_oz, DEFAULT_CATALOG_GRAMS, caps)
+        optimizer_seconds = time.perf_counter() - started
+
+        purchased = plan["total_grams_purchased_in_cycle"]
+        actual = round(int(total_allotment_oz * OUNCES_TO_GRAMS * 10 + 1e-9) / 10 - purchased, 1)
+        status = "ok" if abs(actual - expected) < 1e-9 else "MISMATCH"
+        print(f"  {total_allotment_oz:5.2f} oz caps={caps}: brute {expected:5.1f}g in {brute_seconds * 1000:9.2f} ms,"
+              f" optimizer {actual:5.1f}g in {optimizer_seconds * 1000:7.2f} ms  {status}")
+        assert status == "ok"
+
+    rng = random.Random(35)
+    allotments = [round(0.25 * step, 2) for step in range(1, 41)]
+    patients = [rng.choice(allotments) for _ in range(args.patients)]
+
+    optimizer_cache_clear()
+    started = time.perf_counter()
+    for total_allotment_oz in allotments:
+        optimize_purchase_for_cycle(total_allotment_oz)
+    cold_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for total_allotment_oz in patients:
+        optimize_purchase_for_cycle(total_allotment_oz)
+    cached_seconds = time.perf_counter() - started
+
+    print(f"\n{len(allotments)} distinct allotments, cold: {cold_seconds / len(allotments) * 1000:.2f} ms each")
+    print(f"{args.patients:,} patients, cached: {cached_seconds:.2f}s ({args.patients / cached_seconds:,.0f} plans/s)")
+    print(f"cache: {optimizer_cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
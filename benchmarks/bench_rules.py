@@ -0,0 +1,82 @@
+"""
+Benchmark: calculate_purchase_batch with one rule set vs. a different rule set per row.
+
+A mixed batch must cost no more per row than a single-rule batch. The second
+rule set here is synthetic (a 4-week cycle with 1g units), built in code only
+to give the mixed batch something to switch between; it does not describe
+any jurisdiction. Rows are checked against calculate_purchase_for_cycle under
+their own rule set.
+
+Usage:
+    python benchmarks/bench_rules.py
+    python benchmarks/bench_rules.py --rows 2000000 --repeats 5
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reup_calculator import calculate_purchase_batch, calculate_purchase_for_cycle
+from reup_rules import DEFAULT_RULE_SET, compile_rule_set, register_rule_set
+
+AS_OF = datetime.date(2025, 6, 1)
+SYNTHETIC_RULE_SET = compile_rule_set({
+    "id": "bench_synthetic", "name": "Synthetic benchmark rules",
+    "ounces_to_grams": 28.35, "increment_grams": 1.0, "period_weeks": 4,
+})
+
+
+def make_registry(row_count, seed=35):
+    rng = random.Random(seed)
+    allotments = [round(0.25 * step, 2) for step in range(1, 41)]
+    start_dates = [(AS_OF - datetime.timedelta(days=offset)).isoformat() for offset in range(-30, 365)]
+    rule_set_ids = [DEFAULT_RULE_SET, SYNTHETIC_RULE_SET.id]
+    return ([rng.choice(allotments) for _ in range(row_count)],
+            [rng.choice(start_dates) for _ in range(row_count)],
+            [rng.choice(rule_set_ids) for _ in range(row_count)])
+
+
+def best_rows_per_sec(args, row_count, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        calculate_purchase_batch(*args)
+        best = min(best, time.perf_counter() - started)
+    return row_count / best
+
+
+def check_rows(allotments_oz, start_date_strs, rule_set_ids, columns, row_count):
+    for row in range(row_count):
+        expected = calculate_purchase_for_cycle(allotments_oz[row], start_date_strs[row], AS_OF, rule_set_ids[row])
+        assert columns["total_purchasable_units"][row] == expected["total_purchasable_units"], row
+        for week in expected["full_5_week_plan"]:
+            assert columns["weekly_units"][week["week"] - 1][row] == week["units_to_buy"], row
+        current = expected["current_week_recommendation"]
+        assert columns["current_week"][row] == (current["week"] if current else 0), row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    register_rule_set(SYNTHETIC_RULE_SET)
+    allotments_oz, start_date_strs, rule_set_ids = make_registry(args.rows)
+
+    single = best_rows_per_sec((allotments_oz, start_date_strs, AS_OF), args.rows, args.repeats)
+    mixed = best_rows_per_sec((allotments_oz, start_date_strs, AS_OF, rule_set_ids), args.rows, args.repeats)
+    check_rows(allotments_oz, start_date_strs, rule_set_ids,
+               calculate_purchase_batch(allotments_oz, start_date_strs, AS_OF, rule_set_ids), min(args.rows, 10_000))
+
+    print(f"{args.rows:,} rows")
+    print(f"single rule set  {single:12,.0f} rows/s")
+    print(f"mixed rule sets  {mixed:12,.0f} rows/s ({mixed / single - 1:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Load test: requests/sec against the ReUp planning service on localhost.
+
+By default an in-process server is started on a free port; pass --url to
+target one that is already running (python reup_server.py). Each client holds
+one keep-alive connection and sends requests back to back for --seconds.
+
+Usage:
+    python benchmarks/bench_server.py
+    python benchmarks/bench_server.py --clients 64 --seconds 20 --endpoint batch --batch-size 500
+    python benchmarks/bench_server.py --url http://127.0.0.1:8035
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reup_server import LatencyHistogram, start_server
+
+AS_OF = datetime.date(2025, 6, 1)
+
+
+def make_requests(endpoint, host, batch_size, count=256, seed=35):
+    """Pre-encodes a pool of requests so the clients spend no time building them."""
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        patients = [{"patient_id": f"P{rng.randrange(10**6)}",
+                     "allotment_oz": rng.choice([1.0, 1.5, 2.0, 2.5, 3.25, 4.0]),
+                     "start_date": (AS_OF - datetime.timedelta(days=rng.randrange(40))).isoformat()}
+                    for _ in range(batch_size if endpoint == "batch" else 1)]
+        if endpoint == "batch":
+            body = json.dumps({"as_of": AS_OF.isoformat(), "patients": patients}).encode()
+            head = (f"POST /plan/batch HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n")
+            requests.append(head.encode() + body)
+        else:
+            patient = patients[0]
+            target = (f"/plan?allotment_oz={patient['allotment_oz']}&start_date={patient['start_date']}"
+                      f"&as_of={AS_OF.isoformat()}")
+            requests.append(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    return requests
+
+
+async def client(host, port, requests, deadline, histogram, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        index = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            writer.write(requests[index % len(requests)])
+            index += 1
+            head = await reader.readuntil(b"\r\n\r\n")
+            status = int(head.split(b" ", 2)[1])
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            histogram.record(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run(args):
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        server, _ = await start_server("127.0.0.1", 0)
+        host, port = server.sockets[0].getsockname()[:2]
+
+    requests = make_requests(args.endpoint, host, args.batch_size)
+    histogram = LatencyHistogram()
+    statuses = {}
+    started = time.perf_counter()
+    deadline = started + args.seconds
+    await asyncio.gather(*(client(host, port, requests, deadline, histogram, statuses)
+                           for _ in range(args.clients)))
+    elapsed = time.perf_counter() - started
+
+    if server:
+        server.close()
+        await server.wait_closed()
+
+    snapshot = histogram.snapshot()
+    plans = histogram.count * (args.batch_size if args.endpoint == "batch" else 1)
+    print(f"{args.endpoint} endpoint, {args.clients} keep-alive clients, {elapsed:.1f}s"
+          f"{'' if args.url else ' (in-process server)'}")
+    print(f"  requests: {histogram.count:,} ({histogram.count / elapsed:,.0f} req/s, {plans / elapsed:,.0f} plans/s)")
+    print(f"  latency:  p50 {snapshot['p50_ms']:.3f} ms, p99 {snapshot['p99_ms']:.3f} ms, mean {snapshot['mean_ms']:.3f} ms")
+    print(f"  statuses: {dict(sorted(statuses.items()))}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="Base URL of a running server (default: start one in-process).")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--endpoint", choices=("plan", "batch"), default="plan")
+    parser.add_argument("--batch-size", type=int, default=100)
+    asyncio.run(run(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
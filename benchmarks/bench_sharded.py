@@ -0,0 +1,78 @@
+"""
+Benchmark: scaling of run_plan_parallel with worker count.
+
+Writes a synthetic registry CSV, plans it once with the single-process
+run_plan as the reference, then with run_plan_parallel at each worker count.
+Every parallel output is compared byte-for-byte with the reference.
+
+Usage:
+    python benchmarks/bench_sharded.py                       # 2M rows, 1..cpu_count workers
+    python benchmarks/bench_sharded.py --rows 500000 --workers 1 2 4 8
+"""
+import argparse
+import datetime
+import filecmp
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reup_pipeline import run_plan, run_plan_parallel
+
+
+def default_worker_counts():
+    cpu_count = os.cpu_count() or 1
+    counts = []
+    workers = 1
+    while workers < cpu_count:
+        counts.append(workers)
+        workers *= 2
+    return counts + [cpu_count]
+
+
+def write_registry(path, row_count, seed=35):
+    rng = random.Random(seed)
+    allotments = [f"{0.25 * step:.2f}" for step in range(1, 41)]
+    today = datetime.date.today()
+    start_dates = [(today - datetime.timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range(-30, 365)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("patient_id,allotment_oz,cycle_start\n")
+        for patient in range(row_count):
+            f.write(f"P{patient:09d},{rng.choice(allotments)},{rng.choice(start_dates)}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=default_worker_counts())
+    parser.add_argument("--format", choices=("jsonl", "csv"), default="jsonl", help="Output format.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        in_path = os.path.join(work_dir, "registry.csv")
+        write_registry(in_path, args.rows)
+        reference_path = os.path.join(work_dir, f"reference.{args.format}")
+
+        started = time.perf_counter()
+        run_plan(in_path, reference_path)
+        baseline_seconds = time.perf_counter() - started
+        print(f"{args.rows:,} rows on {os.cpu_count()} CPUs")
+        print(f"  run_plan           {baseline_seconds:8.2f}s  {args.rows / baseline_seconds:12,.0f} rows/s")
+
+        for workers in args.workers:
+            out_path = os.path.join(work_dir, f"parallel-{workers}.{args.format}")
+            started = time.perf_counter()
+            run_plan_parallel(in_path, out_path, workers)
+            seconds = time.perf_counter() - started
+            identical = filecmp.cmp(reference_path, out_path, shallow=False)
+            os.remove(out_path)
+            print(f"  {workers:>3} worker(s)      {seconds:8.2f}s  {args.rows / seconds:12,.0f} rows/s"
+                  f"  speedup {baseline_seconds / seconds:5.2f}x  efficiency {baseline_seconds / seconds / workers:6.1%}"
+                  f"  {'identical' if identical else 'OUTPUT DIFFERS'}")
+
+
+if __name__ == "__main__":
+    main()
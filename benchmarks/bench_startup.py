@@ -0,0 +1,91 @@
+"""
+Startup time: time-to-first-paint of the desktop app, from source and from each build profile.
+
+Each run launches the app with REUP_STARTUP_PROBE pointing at a temp file.
+The app appends the wall-clock time of its first paint and of the moment it
+is fully built (plan calculated, secondary sections shown), then closes
+itself. Times are reported from process launch, so for the packaged builds
+they include the onefile unpack and UPX decompression.
+
+Runs use a scratch working directory, so the app's reup.db is never touched.
+Targets whose executable has not been built are skipped:
+
+    pyinstaller reup_app.spec          # onefile + UPX  -> dist/reup_app(.exe)
+    pyinstaller reup_app_onedir.spec   # onedir, no UPX -> dist/reup_app_onedir/reup_app(.exe)
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --exe onefile=C:/ReUp/ReUp.exe
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from reup_app import STARTUP_PROBE_ENV
+
+EXE_SUFFIX = ".exe" if sys.platform == "win32" else ""
+DEFAULT_TARGETS = {
+    "source": [sys.executable, os.path.join(REPO_DIR, "reup_app.py")],
+    "onefile": [os.path.join(REPO_DIR, "dist", "reup_app" + EXE_SUFFIX)],
+    "onedir": [os.path.join(REPO_DIR, "dist", "reup_app_onedir", "reup_app" + EXE_SUFFIX)],
+}
+
+
+def launch_once(command, timeout: float) -> dict:
+    """Runs the app once and returns seconds from launch to each startup milestone."""
+    with tempfile.TemporaryDirectory() as workdir:
+        probe_path = os.path.join(workdir, "startup.txt")
+        env = dict(os.environ, **{STARTUP_PROBE_ENV: probe_path})
+        launched = time.time()
+        result = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True, timeout=timeout)
+        milestones = {}
+        if os.path.exists(probe_path):
+            with open(probe_path) as f:
+                for line in f:
+                    name, stamp = line.split()
+                    milestones[name] = float(stamp) - launched
+        if "first_paint" not in milestones:
+            detail = (result.stderr.strip().splitlines() or [f"exit code {result.returncode}"])[-1]
+            raise RuntimeError(f"app did not report a first paint: {detail}")
+        return milestones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Launches per target (default 5).")
+    parser.add_argument("--exe", action="append", default=[], metavar="NAME=PATH",
+                        help="Add or override a target executable, e.g. onedir=dist/reup_app_onedir/reup_app.exe.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for one launch.")
+    args = parser.parse_args(argv)
+
+    targets = dict(DEFAULT_TARGETS)
+    for spec in args.exe:
+        name, _, path = spec.partition("=")
+        if not path:
+            parser.error(f"--exe expects NAME=PATH, got {spec!r}")
+        targets[name] = [os.path.abspath(path)]
+
+    print(f"{'target':<10}{'first paint ms':>16}{'min':>10}{'ready ms':>12}")
+    for name, command in targets.items():
+        if not os.path.exists(command[-1]):
+            print(f"{name:<10}  not built ({os.path.relpath(command[-1], REPO_DIR)})")
+            continue
+        try:
+            runs = [launch_once(command, args.timeout) for _ in range(args.runs)]
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f"{name:<10}  failed: {e}")
+            continue
+        first_paint = [run["first_paint"] * 1000 for run in runs]
+        ready = [run.get("ready", run["first_paint"]) * 1000 for run in runs]
+        print(f"{name:<10}{statistics.median(first_paint):>16.1f}{min(first_paint):>10.1f}{statistics.median(ready):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: PatientStore open, lookup and batched write times at scale.
+
+Fills a fresh store with synthetic profiles and purchases in batched
+transactions, then reopens it and times the open, point lookups and a
+date-range purchase query.
+
+Usage:
+    python benchmarks/bench_store.py                       # 1M profiles
+    python benchmarks/bench_store.py --profiles 100000 --purchases-per-profile 20
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reup_store import PatientStore
+
+FIRST_DAY = datetime.date(2024, 1, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=1_000_000)
+    parser.add_argument("--purchases-per-profile", type=int, default=5)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(35)
+    allotments = [0.25 * step for step in range(1, 41)]
+    start_dates = [(FIRST_DAY + datetime.timedelta(days=offset)).isoformat() for offset in range(365)]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "reup.db")
+
+        with PatientStore(path) as store:
+            started = time.perf_counter()
+            store.save_profiles((f"P{patient:08d}", rng.choice(allotments), rng.choice(start_dates))
+                                for patient in range(args.profiles))
+            profile_seconds = time.perf_counter() - started
+
+            purchase_count = args.profiles * args.purchases_per_profile
+            started = time.perf_counter()
+            store.record_purchases((f"P{rng.randrange(args.profiles):08d}", rng.choice(start_dates), 3.5)
+                                   for _ in range(purchase_count))
+            purchase_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        store = PatientStore(path)
+        count = store.profile_count()
+        open_seconds = time.perf_counter() - started
+
+        patient_ids = [f"P{rng.randrange(args.profiles):08d}" for _ in range(args.lookups)]
+        started = time.perf_counter()
+        for patient_id in patient_ids:
+            store.get_profile(patient_id)
+        lookup_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for patient_id in patient_ids[:10_000]:
+            store.purchases(patient_id, "2024-03-01", "2024-04-04")
+        range_seconds = time.perf_counter() - started
+        store.close()
+
+        size_mb = sum(os.path.getsize(os.path.join(work_dir, name)) for name in os.listdir(work_dir)) / 2**20
+
+    print(f"{count:,} profiles, {purchase_count:,} purchases, {size_mb:,.0f} MB on disk")
+    print(f"  save_profiles:         {profile_seconds:8.2f}s  ({args.profiles / profile_seconds:,.0f} rows/s)")
+    print(f"  record_purchases:      {purchase_seconds:8.2f}s  ({purchase_count / purchase_seconds:,.0f} rows/s)")
+    print(f"  open + count:          {open_seconds * 1000:8.2f} ms")
+    print(f"  get_profile:           {lookup_seconds / args.lookups * 1e6:8.2f} us/lookup")
+    print(f"  purchases(date range): {range_seconds / min(len(patient_ids), 10_000) * 1e6:8.2f} us/query")
+
+
+if __name__ == "__main__":
+    main()
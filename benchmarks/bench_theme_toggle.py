@@ -0,0 +1,78 @@
+"""
+Theme toggle latency: milliseconds from a theme button click to the redrawn window.
+
+Builds the real ReUpApp (in a scratch directory, so the app's reup.db is not
+touched) and times each toggle up to the end of the redraw it triggers
+(update_idletasks). Two paths are compared:
+
+    registry     ReUpApp._toggle_theme: widgets switch to the pre-registered styles
+    reconfigure  the old path: re-select the ttk theme and configure every style
+                 again on each toggle, then switch the widgets
+
+Needs a display.
+
+Usage:
+    python benchmarks/bench_theme_toggle.py
+    python benchmarks/bench_theme_toggle.py --toggles 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reup_app import ReUpApp
+from reup_themes import BASE_TTK_THEME
+
+
+def reconfigure_toggle(app):
+    """Switches theme the pre-registry way: theme_use and a full style reconfiguration each time."""
+    registry = app.theme_registry
+    theme_name = registry.next_theme(app.theme_var.get())
+    app.theme_var.set(theme_name)
+    registry.style.theme_use(BASE_TTK_THEME)
+    registry._register(theme_name, app.themes[theme_name])
+    app._apply_theme()
+
+
+def time_toggles(app, toggle, count: int) -> list:
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        toggle()
+        app.update_idletasks()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--toggles", type=int, default=200, help="Toggles per path (default 200).")
+    args = parser.parse_args(argv)
+
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        app = ReUpApp()
+        app.update() # Map the window
+        app._begin_deferred_startup() # No-op if mapping already started it
+        app.update() # Build the deferred sections, so every widget is toggled
+
+        print(f"{'path':<14}{'median ms':>12}{'p95 ms':>10}{'max ms':>10}")
+        for name, toggle in (("registry", app._toggle_theme), ("reconfigure", lambda: reconfigure_toggle(app))):
+            time_toggles(app, toggle, 10) # Warm up
+            timings = sorted(time_toggles(app, toggle, args.toggles))
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{name:<14}{statistics.median(timings):>12.3f}{p95:>10.3f}{timings[-1]:>10.3f}")
+
+        if app.store is not None:
+            app.store.close()
+        app.destroy()
+        os.chdir(original_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Benchmark suite for the calculator hot path.
+
+Measures single-call latency, batch throughput, cold vs. cached plan_cycle calls,
+memory per plan and app import time. Results are written as JSON and compared
+against a stored baseline, and the run exits non-zero when any metric has
+regressed by more than --tolerance.
+
+Opt-in profiling:
+    --stages         time each step of plan_cycle on its own (parse, unit
+                     math, plan building, current week)
+    --cprofile PATH  dump cProfile stats for the single-call loop to PATH
+    --tracemalloc    print the top allocation sites while building plans
+
+Usage:
+    python benchmarks/run_benchmarks.py                     # run and compare with baseline
+    python benchmarks/run_benchmarks.py --save-baseline     # record a new baseline
+    python benchmarks/run_benchmarks.py --quick --stages --cprofile calc.prof
+"""
+import argparse
+import cProfile
+import datetime
+import gc
+import json
+import os
+import platform
+import pstats
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import reup_calculator
+from reup_calculator import (ALLOTMENT_PERIOD_WEEKS, DAYS_IN_WEEK, DISPENSARY_INCREMENT_GRAMS, OUNCES_TO_GRAMS,
+                             calculate_purchase_batch, calculate_purchase_for_cycle, parse_start_date, plan_cycle)
+from reup_rules import DEFAULT_RULE_SET, get_rule_set, split_units_evenly
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_OUTPUT = "bench_results.json"
+AS_OF = datetime.date(2025, 6, 1)
+ALLOTMENT_OZ = 3.25
+START_DATE = "2025-05-20"
+
+# Metrics where a larger value is an improvement; every other metric is a
+# time or a size, where smaller is better.
+HIGHER_IS_BETTER = {"batch_rows_per_sec"}
+
+
+def _best_per_call(func, calls: int, repeats: int) -> float:
+    """Returns the best (lowest) over `repeats` runs of the mean seconds per call."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        timings.append((time.perf_counter() - started) / calls)
+    return min(timings)
+
+
+def _clear_caches():
+    parse_start_date.cache_clear()
+
+
+def _registry(row_count: int):
+    allotments = [0.25 * step for step in range(1, 41)]
+    start_dates = [(AS_OF - datetime.timedelta(days=offset)).isoformat() for offset in range(-30, 365)]
+    return ([allotments[row % len(allotments)] for row in range(row_count)],
+            [start_dates[(row * 7) % len(start_dates)] for row in range(row_count)])
+
+
+def bench_single_call(calls: int, repeats: int) -> dict:
+    return {
+        "calculate_purchase_for_cycle_us": _best_per_call(
+            lambda: calculate_purchase_for_cycle(ALLOTMENT_OZ, START_DATE, AS_OF), calls, repeats) * 1e6,
+        "plan_cycle_us": _best_per_call(
+            lambda: plan_cycle(ALLOTMENT_OZ, START_DATE, AS_OF), calls, repeats) * 1e6,
+    }
+
+
+def bench_cache(calls: int, repeats: int) -> dict:
+    """
+    plan_cycle with its caches cleared vs. warm.
+
+    Weekly plans come from the rule set's precomputed plan table, so "cold"
+    measures the uncached date parse.
+    """
+    def cold_call():
+        _clear_caches()
+        plan_cycle(ALLOTMENT_OZ, START_DATE, AS_OF)
+
+    clear_only = _best_per_call(_clear_caches, calls, repeats)
+    cold = _best_per_call(cold_call, calls, repeats) - clear_only
+    _clear_caches()
+    warm = _best_per_call(lambda: plan_cycle(ALLOTMENT_OZ, START_DATE, AS_OF), calls, repeats)
+    return {"plan_cycle_cold_us": cold * 1e6, "plan_cycle_cached_us": warm * 1e6}
+
+
+def bench_batch(row_count: int, repeats: int) -> dict:
+    allotments_oz, start_date_strs = _registry(row_count)
+    seconds = _best_per_call(lambda: calculate_purchase_batch(allotments_oz, start_date_strs, AS_OF), 1, repeats)
+    return {"batch_rows_per_sec": row_count / seconds}
+
+
+def bench_memory(plan_count: int) -> dict:
+    allotments_oz, start_date_strs = _registry(plan_count)
+    results = {}
+    for name, build in (("cycle_plan_bytes", plan_cycle), ("plan_dict_bytes", calculate_purchase_for_cycle)):
+        gc.collect()
+        tracemalloc.start()
+        plans = [build(oz, start, AS_OF) for oz, start in zip(allotments_oz, start_date_strs)]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[name] = current / len(plans)
+        del plans
+    return results
+
+
+def bench_app_import() -> dict:
+    """Time to import reup_app (and everything it pulls in) in a fresh interpreter."""
+    code = "import time; t = time.perf_counter(); import reup_app; print(time.perf_counter() - t)"
+    timings = []
+    for _ in range(5):
+        output = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True)
+        if output.returncode != 0:
+            return {}  # e.g. Tkinter missing from this interpreter
+        timings.append(float(output.stdout.strip()))
+    return {"app_import_ms": statistics.median(timings) * 1000}
+
+
+def stage_timings(calls: int, repeats: int) -> dict:
+    """
+    Times each step of plan_cycle on its own, in microseconds per call.
+
+    The steps mirror plan_cycle. Parsing is timed uncached (through
+    __wrapped__) and through its cache; plan building is timed from scratch
+    (split_units_evenly) and as plan_cycle does it, through the rule set's
+    plan table.
+    """
+    rules = get_rule_set(DEFAULT_RULE_SET)
+    start_date = parse_start_date(START_DATE)
+    total_allotment_grams = ALLOTMENT_OZ * OUNCES_TO_GRAMS
+    total_units = int(total_allotment_grams // DISPENSARY_INCREMENT_GRAMS)
+    stages = {
+        "parse_uncached": lambda: parse_start_date.__wrapped__(START_DATE),
+        "parse_cached": lambda: parse_start_date(START_DATE),
+        "unit_math": lambda: int(ALLOTMENT_OZ * OUNCES_TO_GRAMS // DISPENSARY_INCREMENT_GRAMS),
+        "plan_build_uncached": lambda: split_units_evenly(total_units, ALLOTMENT_PERIOD_WEEKS,
+                                                          DISPENSARY_INCREMENT_GRAMS),
+        "plan_build_cached": lambda: rules.weekly_plan(total_units),
+        "current_week": lambda: (AS_OF - start_date).days // DAYS_IN_WEEK + 1,
+        "result_object": lambda: reup_calculator.CyclePlan(ALLOTMENT_OZ, total_allotment_grams, total_units,
+                                                           rules.weekly_plan(total_units), 2, rules),
+        "to_dict": (lambda plan: lambda: plan.to_dict())(plan_cycle(ALLOTMENT_OZ, START_DATE, AS_OF)),
+    }
+    return {name: _best_per_call(stage, calls, repeats) * 1e6 for name, stage in stages.items()}
+
+
+def run_cprofile(path: str, calls: int):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(calls):
+        calculate_purchase_for_cycle(ALLOTMENT_OZ, START_DATE, AS_OF)
+    profiler.disable()
+    profiler.dump_stats(path)
+    print(f"\ncProfile stats for {calls:,} calls written to {path}; top entries:")
+    pstats.Stats(profiler).sort_stats("tottime").print_stats(8)
+
+
+def run_tracemalloc(plan_count: int):
+    allotments_oz, start_date_strs = _registry(plan_count)
+    tracemalloc.start()
+    plans = [calculate_purchase_for_cycle(oz, start, AS_OF) for oz, start in zip(allotments_oz, start_date_strs)]
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    print(f"\nTop allocation sites for {len(plans):,} plan dicts:")
+    for stat in snapshot.statistics("lineno")[:8]:
+        print(f"  {stat}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Prints each metric against the baseline and returns the names that regressed."""
+    regressions = []
+    print(f"\n{'metric':<34}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<34}{'-':>14}{value:>14.3f}{'new':>10}")
+            continue
+        change = value / base - 1
+        worse = -change if name in HIGHER_IS_BETTER else change
+        flag = "  REGRESSED" if worse > tolerance else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<34}{base:>14.3f}{value:>14.3f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"Results JSON (default {DEFAULT_OUTPUT}).")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown before a metric counts as regressed (default 0.25 = 25%%).")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations, for a fast smoke run.")
+    parser.add_argument("--stages", action="store_true", help="Also time each plan_cycle stage separately.")
+    parser.add_argument("--cprofile", metavar="PATH", help="Dump cProfile stats of the single-call loop.")
+    parser.add_argument("--tracemalloc", action="store_true", help="Print top allocation sites.")
+    args = parser.parse_args(argv)
+
+    calls, repeats, batch_rows, plan_count = (20_000, 5, 200_000, 50_000) if not args.quick else (2_000, 3, 20_000, 5_000)
+
+    results = {}
+    results.update(bench_single_call(calls, repeats))
+    results.update(bench_cache(calls // 10, repeats))
+    results.update(bench_batch(batch_rows, repeats))
+    results.update(bench_memory(plan_count))
+    results.update(bench_app_import())
+    if args.stages:
+        results.update({f"stage_{name}_us": value for name, value in stage_timings(calls, repeats).items()})
+
+    report = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.processor() or platform.machine()},
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}")
+
+    regressions = []
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"Baseline saved to {args.baseline}")
+        compare(results, {}, args.tolerance)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"Comparing with baseline from {baseline.get('timestamp', '?')} ({baseline.get('machine', {}).get('platform', '?')})")
+        regressions = compare(results, baseline.get("results", {}), args.tolerance)
+    else:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one.")
+        compare(results, {}, args.tolerance)
+
+    if args.cprofile:
+        run_cprofile(args.cprofile, calls)
+    if args.tracemalloc:
+        run_tracemalloc(plan_count)
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
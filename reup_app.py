@@ -1,12 +1,31 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import datetime
-import json
-import webbrowser
-import sys, os
+import sys, os, time
+import sqlite3
+# webbrowser and concurrent.futures are imported where they are first used;
+# together they pull in subprocess and logging, which would slow every launch.
 
 # Import the core calculation logic from our other file
-from reup_calculator import calculate_purchase_for_cycle
+import reup_metrics
+from reup_calculator import plan_cycle
+from reup_store import DEFAULT_DB_PATH, PatientStore
+from reup_themes import DEFAULT_THEME, THEMES, ThemeRegistry
+
+# Profile id the desktop app saves its own allotment under in the shared store
+APP_PATIENT_ID = "default"
+
+# Live mode: wait this long after the last keystroke before recalculating,
+# then check for the background result at this interval.
+LIVE_DEBOUNCE_MS = 300
+LIVE_POLL_MS = 15
+
+# Deferred startup work runs once the window is mapped, or after this long at the latest.
+STARTUP_FALLBACK_MS = 500
+
+# Set to a file path to have the app append "first_paint" and "ready" times
+# (seconds since the epoch) to it and then close; used by benchmarks/bench_startup.py.
+STARTUP_PROBE_ENV = "REUP_STARTUP_PROBE"
 
 class Tooltip:
     """
@@ -52,15 +71,8 @@ class ReUpApp(tk.Tk):
         super().__init__()
 
         # --- Theme Data ---
-        self.themes = {
-            "light": {
-                "bg": "#F0F0F0", "fg": "black", "entry_bg": "white", "tree_bg": "white", "tree_fg": "black", "highlight": "lightblue", "link_fg": "blue"
-            },
-            "dark": {
-                "bg": "#2E2E2E", "fg": "white", "entry_bg": "#555555", "tree_bg": "#3C3C3C", "tree_fg": "white", "highlight": "#00405A", "link_fg": "#58A6FF"
-            }
-        }
-        self.theme_var = tk.StringVar(value="light")
+        self.themes = THEMES
+        self.theme_var = tk.StringVar(value=DEFAULT_THEME)
 
 
         # --- Dispensary Data ---
@@ -95,8 +107,9 @@ class ReUpApp(tk.Tk):
         # --- Load Config and Set Variables ---
         config = self._load_config()
         self.allotment_var = tk.StringVar(value=config.get("allotment", "3.25"))
-        self.theme_var.set(config.get("theme", "light"))
+        self.theme_var.set(config.get("theme", DEFAULT_THEME))
         self.start_date_var = tk.StringVar(value=config.get("start_date", datetime.date.today().strftime('%Y-%m-%d')))
+        self.live_var = tk.BooleanVar(value=config.get("live_mode", "True") == "True")
 
         # --- Input Fields ---
         # Allotment        
@@ -104,7 +117,7 @@ class ReUpApp(tk.Tk):
         allotment_label_frame.grid(row=0, column=0, columnspan=2, sticky="w")
         
         ttk.Label(allotment_label_frame, text="Total 35-Day Allotment (oz):").pack(side="left")
-        self.allotment_tooltip_label = ttk.Label(allotment_label_frame, text="What is this?", cursor="hand2")
+        self.allotment_tooltip_label = ttk.Label(allotment_label_frame, text="What is this?", style="Link.TLabel", cursor="hand2")
         self.allotment_tooltip_label.pack(side="left", padx=5)
         Tooltip(self.allotment_tooltip_label, "Get your 35-day allotment total from the Medical Marijuana Use Registry, your doctor, or the dispensary if you are unsure.")
 
@@ -116,15 +129,27 @@ class ReUpApp(tk.Tk):
         start_date_label_frame.grid(row=2, column=0, columnspan=2, sticky="w")
 
         ttk.Label(start_date_label_frame, text="Cycle Start Date (YYYY-MM-DD):").pack(side="left")
-        self.start_date_tooltip_label = ttk.Label(start_date_label_frame, text="What is this?", cursor="hand2")
+        self.start_date_tooltip_label = ttk.Label(start_date_label_frame, text="What is this?", style="Link.TLabel", cursor="hand2")
         self.start_date_tooltip_label.pack(side="left", padx=5)
         Tooltip(self.start_date_tooltip_label, "This is the first day of your 35-day allotment period. You can find this date in the Medical Marijuana Use Registry.")
         self.start_date_entry = ttk.Entry(self.main_frame, textvariable=self.start_date_var)
         self.start_date_entry.grid(row=3, column=0, columnspan=2, sticky="ew", pady=(2, 10))
 
-        # --- Calculate Button ---
-        self.calc_button = ttk.Button(self.main_frame, text="ReUp", command=self.get_recommendation)
-        self.calc_button.grid(row=4, column=0, columnspan=2, sticky="ew", pady=(10,5))
+        # --- Calculate Button and Live Mode ---
+        action_frame = ttk.Frame(self.main_frame)
+        action_frame.grid(row=4, column=0, columnspan=2, sticky="ew", pady=(10,5))
+        action_frame.columnconfigure(0, weight=1)
+
+        self.calc_button = ttk.Button(action_frame, text="ReUp", command=self.get_recommendation)
+        self.calc_button.grid(row=0, column=0, sticky="ew")
+        self.live_check = ttk.Checkbutton(action_frame, text="Live", variable=self.live_var, command=self._schedule_live_recalc)
+        self.live_check.grid(row=0, column=1, sticky="e", padx=(10, 0))
+        Tooltip(self.live_check, "Update the plan automatically as you type.")
+
+        # Inline input errors, instead of a popup (which live mode would raise on every keystroke)
+        self.input_error_var = tk.StringVar(value="")
+        self.input_error_label = ttk.Label(action_frame, textvariable=self.input_error_var, style="Error.TLabel")
+        self.input_error_label.grid(row=1, column=0, columnspan=2, sticky="w")
 
         # --- Result Display ---
         self.result_var = tk.StringVar(value="Enter your details and click the button")
@@ -143,6 +168,8 @@ class ReUpApp(tk.Tk):
         
         # Tag for highlighting the current week
         self.tree.tag_configure('current_week', font=('Helvetica', 10, 'bold'))
+        # (values, tags) last written to each row, so updates only touch cells that changed
+        self.tree_rows = {}
         
         self.tree.grid(row=6, column=0, columnspan=2, sticky="ew", pady=(5, 10))
 
@@ -162,6 +189,78 @@ class ReUpApp(tk.Tk):
         self.details_leftover_label = ttk.Label(details_frame, textvariable=self.details_leftover_var)
         self.details_leftover_label.grid(row=2, column=0, sticky="w")
 
+        # Dispensary Quick Shop and Resources are built after the first paint (see _build_secondary_sections)
+
+        # --- Footer and Theme Toggle ---
+        footer_frame = ttk.Frame(self.main_frame)
+        footer_frame.grid(row=10, column=0, columnspan=2, sticky="ew", pady=(15, 0))
+        footer_frame.columnconfigure(1, weight=1) # Allow center column to expand
+
+        self.theme_button = ttk.Button(footer_frame, text="\u263C", width=3, command=self._toggle_theme)
+        self.theme_button.grid(row=0, column=0, sticky="w")
+
+        # Privacy & Terms Link
+        self.privacy_label = ttk.Label(footer_frame, text="Privacy & Terms", style="Muted.TLabel", cursor="hand2")
+        self.privacy_label.grid(row=0, column=1, sticky="w", padx=10)
+        # Using a placeholder URL, you can change this to the correct one.
+        self.privacy_label.bind("<Button-1>", lambda e: self._open_url("https://moondogdevelopment.com/privacy"))
+
+        current_year = datetime.date.today().year
+        footer_text = f"© {current_year} Moondog Development"
+        self.footer_label = ttk.Label(footer_frame, text=footer_text, style="Muted.TLabel", cursor="hand2")
+        self.footer_label.grid(row=0, column=2, sticky="e")
+        self.footer_label.bind("<Button-1>", lambda e: self._open_url("https://moondogdevelopment.com"))
+
+        # --- Protocol for saving on close ---
+        self.protocol("WM_DELETE_WINDOW", self._on_closing)
+
+        # --- Live recalculation as the inputs change ---
+        self._live_executor = None # Created on first use
+        self._live_after_id = None
+        self._live_poll_id = None
+        self._live_generation = 0
+        self.allotment_var.trace_add("write", self._schedule_live_recalc)
+        self.start_date_var.trace_add("write", self._schedule_live_recalc)
+
+        # --- Apply initial theme ---
+        self.theme_registry = ThemeRegistry(self, self.themes) # Registers every theme's styles once
+        self._apply_theme()
+
+        # Show the window first: the first calculation and the secondary
+        # sections are built from the event loop once it is on screen.
+        self._startup_pending = True
+        self.bind("<Map>", self._on_map, add="+")
+        self.after(STARTUP_FALLBACK_MS, self._begin_deferred_startup) # In case the window starts unmapped
+
+    def _on_map(self, event):
+        if event.widget is self:
+            self._begin_deferred_startup()
+
+    def _begin_deferred_startup(self):
+        if self._startup_pending:
+            self._startup_pending = False
+            self.after_idle(self._finish_startup)
+
+    def _finish_startup(self):
+        self.update_idletasks() # Flush the first paint
+        self._report_startup("first_paint")
+        self.get_recommendation()
+        self.update_idletasks() # Show the plan before building the rest
+        self._build_secondary_sections()
+        self.update_idletasks()
+        self._report_startup("ready")
+
+    def _report_startup(self, milestone):
+        """Appends a startup milestone to the probe file, if one is set, and closes the app once ready."""
+        probe_path = os.environ.get(STARTUP_PROBE_ENV)
+        if not probe_path:
+            return
+        with open(probe_path, "a") as f:
+            f.write(f"{milestone} {time.time():.6f}\n")
+        if milestone == "ready":
+            self.after_idle(self.destroy) # Skip _on_closing so probe runs never touch saved settings
+
+    def _build_secondary_sections(self):
         # --- Dispensary Section ---
         dispensary_frame = ttk.LabelFrame(self.main_frame, text="Dispensary Quick Shop", padding="10")
         dispensary_frame.grid(row=8, column=0, columnspan=2, sticky="ew", pady=(15, 0))
@@ -182,88 +281,126 @@ class ReUpApp(tk.Tk):
         resources_frame.grid(row=9, column=0, columnspan=2, sticky="ew", pady=(15, 0))
         resources_frame.columnconfigure(0, weight=1)
 
-        self.mmur_label = ttk.Label(resources_frame, text="Florida MMU Registry", cursor="hand2")
+        self.mmur_label = ttk.Label(resources_frame, text="Florida MMU Registry", style="Link.TLabel", cursor="hand2")
         self.mmur_label.grid(row=0, column=0, sticky="w")
         self.mmur_label.bind("<Button-1>", lambda e: self._open_url("https://mmuregistry.flhealth.gov/"))
 
-        self.norml_label = ttk.Label(resources_frame, text="NORML Florida Chapter", cursor="hand2")
+        self.norml_label = ttk.Label(resources_frame, text="NORML Florida Chapter", style="Link.TLabel", cursor="hand2")
         self.norml_label.grid(row=1, column=0, sticky="w")
         self.norml_label.bind("<Button-1>", lambda e: self._open_url("https://norml.org/florida/"))
 
-        self.mmjhealth_label = ttk.Label(resources_frame, text="MMJ Health", cursor="hand2")
+        self.mmjhealth_label = ttk.Label(resources_frame, text="MMJ Health", style="Link.TLabel", cursor="hand2")
         self.mmjhealth_label.grid(row=2, column=0, sticky="w")
         self.mmjhealth_label.bind("<Button-1>", lambda e: self._open_url("https://mmjhealth.com/"))
 
-        # --- Footer and Theme Toggle ---
-        footer_frame = ttk.Frame(self.main_frame)
-        footer_frame.grid(row=10, column=0, columnspan=2, sticky="ew", pady=(15, 0))
-        footer_frame.columnconfigure(1, weight=1) # Allow center column to expand
-
-        self.theme_button = ttk.Button(footer_frame, text="\u263C", width=3, command=self._toggle_theme)
-        self.theme_button.grid(row=0, column=0, sticky="w")
-
-        # Privacy & Terms Link
-        self.privacy_label = ttk.Label(footer_frame, text="Privacy & Terms", foreground="grey", cursor="hand2")
-        self.privacy_label.grid(row=0, column=1, sticky="w", padx=10)
-        # Using a placeholder URL, you can change this to the correct one.
-        self.privacy_label.bind("<Button-1>", lambda e: self._open_url("https://moondogdevelopment.com/privacy"))
-
-        current_year = datetime.date.today().year
-        footer_text = f"© {current_year} Moondog Development"
-        self.footer_label = ttk.Label(footer_frame, text=footer_text, cursor="hand2")
-        self.footer_label.grid(row=0, column=2, sticky="e")
-        self.footer_label.bind("<Button-1>", lambda e: self._open_url("https://moondogdevelopment.com"))
-
-        # --- Protocol for saving on close ---
-        self.protocol("WM_DELETE_WINDOW", self._on_closing)
-
-        # --- Apply initial theme ---
-        self._apply_theme()
-
-        # Force the UI to draw itself and process pending events.
-        self.update_idletasks()
-        # Now that the UI is ready, run the initial calculation.
-        self.get_recommendation()
+        for frame in (dispensary_frame, resources_frame):
+            self.theme_registry.apply(frame, self.theme_var.get())
 
     def get_recommendation(self, event=None): # Add event=None to handle button clicks
-        self.tree.delete(*self.tree.get_children()) # Clear previous results
+        metrics = reup_metrics.active
+        if metrics is not None:
+            started = time.perf_counter()
         try:
-            allotment_oz = float(self.allotment_var.get())
-            start_date = self.start_date_var.get()
-
-            recommendation = calculate_purchase_for_cycle(allotment_oz, start_date)
-
-            if "error" in recommendation: # Handle errors from the calculator
-                raise ValueError(recommendation["error"])
-
-            # Update the details section
-            self.details_grams_var.set(f"Total Grams in Allotment: {recommendation['total_allotment_grams']:.2f}g")
-            self.details_purchased_var.set(f"Total Grams in Plan: {recommendation['total_grams_purchased_in_cycle']:.2f}g")
-            
-            leftover_grams = recommendation['grams_leftover_at_end_of_cycle']
-            leftover_text = f"Grams Left Unused: {leftover_grams:.2f}g"
-            # if leftover_grams >= 1.0:
-            #     leftover_text += " (Buy a 1g Pre-Roll!)"
-            self.details_leftover_var.set(leftover_text)
-
-            # Populate the 5-week plan
-            for week_plan in recommendation['full_5_week_plan']:
-                tags = ()
-                if recommendation.get("current_week_recommendation") and week_plan['week'] == recommendation['current_week_recommendation']['week']:
-                    tags = ('current_week',)
-                self.tree.insert('', tk.END, values=(week_plan['week'], week_plan['units_to_buy'], f"{week_plan['grams_to_buy']:.2f}g"), tags=tags)
-
-            # Update the summary text
-            current_rec = recommendation.get("current_week_recommendation")
-            if current_rec:
-                units = current_rec['units_to_buy']
-                self.result_var.set(f"8ths to Purchase this week: {units}")
-            else:
-                self.result_var.set("You are outside the 35-day cycle.")
+            plan = self._calculate_plan(self.allotment_var.get(), self.start_date_var.get())
+            self._show_plan(plan)
+            if metrics is not None:
+                metrics.record("get_recommendation", time.perf_counter() - started)
 
         except ValueError as e:
-            messagebox.showerror("Input Error", str(e))
-            self.result_var.set("Calculation failed. Check inputs.")
+            self._show_error(str(e))
+            if metrics is not None:
+                metrics.record("get_recommendation", time.perf_counter() - started, errors=(str(e),))
+
+    @staticmethod
+    def _calculate_plan(allotment_text, start_date):
+        allotment_oz = float(allotment_text)
+        return plan_cycle(allotment_oz, start_date) # Raises ValueError on bad input
+
+    def _show_plan(self, plan):
+        self._set_if_changed(self.input_error_var, "")
+
+        # Update the details section
+        self._set_if_changed(self.details_grams_var, f"Total Grams in Allotment: {plan.total_allotment_grams:.2f}g")
+        self._set_if_changed(self.details_purchased_var, f"Total Grams in Plan: {plan.total_grams_purchased:.2f}g")
+
+        leftover_grams = plan.grams_leftover
+        leftover_text = f"Grams Left Unused: {leftover_grams:.2f}g"
+        # if leftover_grams >= 1.0:
+        #     leftover_text += " (Buy a 1g Pre-Roll!)"
+        self._set_if_changed(self.details_leftover_var, leftover_text)
+
+        # Populate the 5-week plan, patching only the rows, cells and tags that changed
+        for week_num, units_to_buy, grams_to_buy in plan.weekly_plan:
+            iid = f"week{week_num}"
+            values = (week_num, units_to_buy, f"{grams_to_buy:.2f}g")
+            tags = ('current_week',) if week_num == plan.current_week_num else ()
+            previous = self.tree_rows.get(iid)
+            if previous is None:
+                self.tree.insert('', tk.END, iid=iid, values=values, tags=tags)
+            elif previous[0] != values:
+                self.tree.item(iid, values=values, tags=tags)
+            elif previous[1] != tags:
+                self.tree.item(iid, tags=tags)
+            self.tree_rows[iid] = (values, tags)
+        for iid in list(self.tree_rows)[len(plan.weekly_plan):]:
+            self.tree.delete(iid)
+            del self.tree_rows[iid]
+
+        # Update the summary text
+        current_rec = plan.current_week
+        if current_rec:
+            units = current_rec[1]
+            self._set_if_changed(self.result_var, f"8ths to Purchase this week: {units}")
+        else:
+            self._set_if_changed(self.result_var, "You are outside the 35-day cycle.")
+
+    def _show_error(self, message):
+        """Shows an input error inline and clears the last plan, so it is not mistaken for the current one."""
+        self._set_if_changed(self.input_error_var, message)
+        self._set_if_changed(self.result_var, "Calculation failed. Check inputs.")
+        self._set_if_changed(self.details_grams_var, "Total Grams in Allotment: -")
+        self._set_if_changed(self.details_purchased_var, "Total Grams in Plan: -")
+        self._set_if_changed(self.details_leftover_var, "Grams Left Unused: -")
+        if self.tree_rows:
+            self.tree.delete(*self.tree_rows)
+            self.tree_rows.clear()
+
+    @staticmethod
+    def _set_if_changed(var, text):
+        if var.get() != text:
+            var.set(text)
+
+    def _schedule_live_recalc(self, *args):
+        """Restarts the debounce timer; the plan is recalculated once typing pauses."""
+        if self._live_after_id is not None:
+            self.after_cancel(self._live_after_id)
+            self._live_after_id = None
+        if self.live_var.get():
+            self._live_after_id = self.after(LIVE_DEBOUNCE_MS, self._start_live_recalc)
+
+    def _start_live_recalc(self):
+        self._live_after_id = None
+        self._live_generation += 1
+        if self._live_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._live_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reup-live")
+        # Read the Tk variables here, on the event loop; the worker only calculates.
+        future = self._live_executor.submit(self._calculate_plan, self.allotment_var.get(), self.start_date_var.get())
+        self._live_poll_id = self.after(LIVE_POLL_MS, self._finish_live_recalc, future, self._live_generation)
+
+    def _finish_live_recalc(self, future, generation):
+        if not future.done():
+            self._live_poll_id = self.after(LIVE_POLL_MS, self._finish_live_recalc, future, generation)
+            return
+        self._live_poll_id = None
+        if generation != self._live_generation:
+            return # The inputs changed again; a newer result is on its way
+        try:
+            plan = future.result()
+        except ValueError as e:
+            self._show_error(str(e))
+            return
+        self._show_plan(plan)
 
     def _open_shop_website(self):
         selected_dispensary = self.dispensary_var.get()
@@ -271,74 +408,69 @@ class ReUpApp(tk.Tk):
             messagebox.showwarning("No Selection", "Please select a dispensary from the list.")
             return
         
-        url = self.dispensaries.get(selected_dispensary)
-        webbrowser.open_new_tab(url)
+        self._open_url(self.dispensaries.get(selected_dispensary))
 
     def _open_url(self, url):
+        import webbrowser
         webbrowser.open_new_tab(url)
 
     def _load_config(self):
+        self.store = None
         try:
-            with open("config.json", "r") as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {} # Return empty dict if file doesn't exist or is invalid
+            self.store = PatientStore(DEFAULT_DB_PATH)
+            self.store.import_legacy_config("config.json") # One-time move from the old config file
+            return self.store.get_settings()
+        except sqlite3.Error:
+            # A corrupt or unreadable reup.db: start with the defaults and leave the file alone
+            if self.store is not None:
+                self.store.close()
+                self.store = None
+            return {}
 
     def _on_closing(self):
         config_data = {
             "allotment": self.allotment_var.get(),
             "start_date": self.start_date_var.get(),
-            "theme": self.theme_var.get()
+            "theme": self.theme_var.get(),
+            "live_mode": self.live_var.get()
         }
-        with open("config.json", "w") as f:
-            json.dump(config_data, f, indent=4)
+        if self.store is not None:
+            try:
+                self.store.save_settings(config_data) # Saved atomically in one transaction
+                try:
+                    # Keep the app's own profile in the shared store for bulk tooling.
+                    self.store.save_profile(APP_PATIENT_ID, float(config_data["allotment"]), config_data["start_date"])
+                except ValueError:
+                    pass # Invalid entries are still kept in settings, as typed
+            except sqlite3.Error:
+                pass # e.g. bulk tooling holds the write lock; closing the window matters more
+            finally:
+                self.store.close()
+        for after_id in (self._live_after_id, self._live_poll_id):
+            if after_id is not None:
+                self.after_cancel(after_id)
+        if self._live_executor is not None:
+            self._live_executor.shutdown(wait=False)
         self.destroy()
 
     def _toggle_theme(self):
-        if self.theme_var.get() == "light":
-            self.theme_var.set("dark")
-        else:
-            self.theme_var.set("light")
+        self.theme_var.set(self.theme_registry.next_theme(self.theme_var.get()))
         self._apply_theme()
 
     def _apply_theme(self):
         theme_name = self.theme_var.get()
+        if theme_name not in self.theme_registry:
+            theme_name = DEFAULT_THEME # e.g. a theme saved by a newer version
+            self.theme_var.set(theme_name)
         colors = self.themes[theme_name]
 
         # Update button icon
-        self.theme_button.config(text="\u263D" if theme_name == "light" else "\u263C")
+        self.theme_button.config(text=colors["icon"])
 
-        # Configure root window and frames
+        # The styles are already registered; only point the widgets at this theme's names.
         self.config(bg=colors["bg"])
-        self.main_frame.config(style="TFrame")
-        
-        # Configure styles for all widgets
-        style = ttk.Style(self)
-        style.theme_use('clam') # Use a theme that allows for more customization
-
-        style.configure("TFrame", background=colors["bg"])
-        style.configure("TLabel", background=colors["bg"], foreground=colors["fg"])
-        style.configure("TLabelframe", background=colors["bg"], bordercolor=colors["fg"])
-        style.configure("TLabelframe.Label", background=colors["bg"], foreground=colors["fg"])
-
-        # Configure complex widgets like Entry, Button, and Combobox
-        style.configure("TEntry", fieldbackground=colors["entry_bg"], foreground=colors["fg"], insertcolor=colors["fg"], borderwidth=0)
-        style.configure("TButton", foreground=colors["fg"], background=colors["entry_bg"], borderwidth=0)
-        style.map("TButton", background=[('active', colors["highlight"])])
-        style.configure("TCombobox", foreground=colors["fg"])
-        style.map("TCombobox", fieldbackground=[('readonly', colors["entry_bg"])], selectbackground=[('readonly', colors["entry_bg"])], selectforeground=[('readonly', colors["fg"])])
-
-        # Update special link labels
-        self.allotment_tooltip_label.config(foreground=colors["link_fg"])
-        self.start_date_tooltip_label.config(foreground=colors["link_fg"])
-        self.mmur_label.config(foreground=colors["link_fg"])
-        self.norml_label.config(foreground=colors["link_fg"])
-        self.mmjhealth_label.config(foreground=colors["link_fg"])
-        self.footer_label.config(foreground="grey") # Keep footer subtle
-        self.privacy_label.config(foreground="grey") # Keep privacy link subtle
-
-        style.configure("Treeview", background=colors["tree_bg"], fieldbackground=colors["tree_bg"], foreground=colors["tree_fg"])
-        self.tree.tag_configure('current_week', background=colors["highlight"], foreground=colors["fg"])
+        self.theme_registry.apply(self.main_frame, theme_name)
+        self.tree.tag_configure('current_week', background=colors["highlight"], foreground=colors["highlight_fg"])
 
 if __name__ == "__main__":
     app = ReUpApp()
@@ -5,7 +5,7 @@ a = Analysis(
     ['reup_app.py'],
     pathex=[],
     binaries=[],
-    datas=[('reup_icon.ico', '.')],
+    datas=[('reup_icon.ico', '.'), ('rules', 'rules')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,48 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Fast-startup build: a onedir bundle without UPX. Nothing is unpacked to a
+# temp dir or decompressed on launch, so the window appears sooner than with
+# the onefile build in reup_app.spec. Builds to dist/reup_app_onedir/.
+
+
+a = Analysis(
+    ['reup_app.py'],
+    pathex=[],
+    binaries=[],
+    datas=[('reup_icon.ico', '.'), ('rules', 'rules')],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[],
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='reup_app',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon='reup_icon.ico',
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='reup_app_onedir',
+)
@@ -3,84 +3,412 @@ ReUp: Medical Marijuana Allotment Calculator
 
 This script provides the core logic for calculating weekly purchase recommendations
 based on a 35-day allotment.
+
+Plans follow a rule set (see reup_rules); the constants below are Florida's
+smokable rules, which are the default.
 """
+import array
 import datetime
+import functools
+import itertools
+import time
+
+import reup_metrics
+from reup_rules import DEFAULT_RULE_SET, RuleSet, get_rule_set
+
+# Constants for conversion, as aliases of the default florida_smokable rule
+# set (rules/florida_smokable.json). They are looked up by the module
+# __getattr__ below, so the rule file is only read once one is used.
+_DEFAULT_RULE_SET_ALIASES = {
+    "OUNCES_TO_GRAMS": "ounces_to_grams",
+    "DISPENSARY_INCREMENT_GRAMS": "increment_grams",  # Standard "eighth" in grams
+    "ALLOTMENT_PERIOD_WEEKS": "period_weeks",
+    "DAYS_IN_WEEK": "days_in_week",
+}
+
+
+def __getattr__(name):
+    attribute = _DEFAULT_RULE_SET_ALIASES.get(name)
+    if attribute is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(get_rule_set(DEFAULT_RULE_SET), attribute)
 
-# Constants for conversion
-OUNCES_TO_GRAMS = 28.35
-DISPENSARY_INCREMENT_GRAMS = 3.5  # Standard "eighth" in grams
-ALLOTMENT_PERIOD_WEEKS = 5
-DAYS_IN_WEEK = 7
 
-def calculate_purchase_for_cycle(total_allotment_oz: float, start_date_str: str) -> dict:
+# Distinct start-date strings kept by the date parser cache.
+DATE_CACHE_SIZE = 4096
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_start_date(start_date_str: str) -> datetime.date:
     """
-    Calculates a 5-week purchasing plan and identifies the current week's recommendation.
+    Parses a 'YYYY-MM-DD' cycle start date.
+
+    Zero-padded ISO dates go through date.fromisoformat, which is far cheaper
+    than strptime; anything else (such as '2025-1-5') falls back to strptime so
+    the accepted formats are unchanged. Results are cached per string.
+
+    Raises:
+        ValueError: If the value is not a valid 'YYYY-MM-DD' date string.
+    """
+    if not isinstance(start_date_str, str):  # e.g. a number or null from a JSON record
+        raise ValueError("Invalid date format. Please use YYYY-MM-DD.")
+    if len(start_date_str) == 10 and start_date_str[4] == '-' and start_date_str[7] == '-':
+        try:
+            return datetime.date.fromisoformat(start_date_str)
+        except ValueError:
+            pass
+    try:
+        return datetime.datetime.strptime(start_date_str, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError("Invalid date format. Please use YYYY-MM-DD.") from None
+
+class CyclePlan:
+    """
+    An immutable cycle purchasing plan for one patient.
+
+    The weekly plan is a shared tuple from the rule set's plan table, so
+    building a CyclePlan allocates one small object and no per-week
+    containers. Use to_dict() for the dictionary returned by
+    calculate_purchase_for_cycle.
+
+    Attributes:
+        total_allotment_oz: The allotment the plan was built from, in ounces.
+        total_allotment_grams: The allotment in grams (unrounded).
+        total_units: The number of units (3.5g under the default rules) purchasable in the cycle.
+        weekly_plan: A tuple of (week, units_to_buy, grams_to_buy) rows.
+        current_week_num: The week of the cycle on the as-of date (normally today).
+            It is outside 1-5 when that date falls before or after the cycle.
+        rule_set: The RuleSet the plan follows.
+    """
+    __slots__ = ("total_allotment_oz", "total_allotment_grams", "total_units", "weekly_plan", "current_week_num",
+                 "rule_set")
+
+    def __init__(self, total_allotment_oz: float, total_allotment_grams: float, total_units: int,
+                 weekly_plan: tuple, current_week_num: int, rule_set: RuleSet = None):
+        object.__setattr__(self, "total_allotment_oz", total_allotment_oz)
+        object.__setattr__(self, "total_allotment_grams", total_allotment_grams)
+        object.__setattr__(self, "total_units", total_units)
+        object.__setattr__(self, "weekly_plan", weekly_plan)
+        object.__setattr__(self, "current_week_num", current_week_num)
+        object.__setattr__(self, "rule_set", rule_set or get_rule_set(DEFAULT_RULE_SET))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"CyclePlan is immutable; cannot set '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"CyclePlan is immutable; cannot delete '{name}'")
+
+    def __reduce__(self):
+        # Pickled and copied through the constructor, which __setattr__ would otherwise block.
+        return (CyclePlan, (self.total_allotment_oz, self.total_allotment_grams, self.total_units, self.weekly_plan,
+                            self.current_week_num, self.rule_set))
+
+    def __eq__(self, other):
+        if not isinstance(other, CyclePlan):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return (f"CyclePlan(total_allotment_oz={self.total_allotment_oz!r}, total_units={self.total_units}, "
+                f"weekly_units={self.weekly_units}, current_week_num={self.current_week_num}, "
+                f"rule_set={self.rule_set.id!r})")
+
+    def _key(self):
+        return (self.total_allotment_oz, self.total_units, self.weekly_plan, self.current_week_num, self.rule_set.id)
+
+    @property
+    def weekly_units(self) -> tuple:
+        """The units to buy in each week, in week order."""
+        return tuple(units for _, units, _ in self.weekly_plan)
+
+    @property
+    def total_grams_purchased(self) -> float:
+        return self.total_units * self.rule_set.increment_grams
+
+    @property
+    def grams_leftover(self) -> float:
+        return self.total_allotment_grams - self.total_grams_purchased
+
+    @property
+    def current_week(self):
+        """The (week, units_to_buy, grams_to_buy) row for the as-of date, or None outside the cycle."""
+        if 1 <= self.current_week_num <= len(self.weekly_plan):
+            return self.weekly_plan[self.current_week_num - 1]
+        return None
+
+    def to_dict(self) -> dict:
+        """
+        Returns the plan in the dictionary shape of calculate_purchase_for_cycle.
+
+        The weeks are listed under "full_5_week_plan" whatever the rule set's
+        period, so existing readers of the dictionary keep working.
+        """
+        weekly_plan = [
+            {"week": week_num, "units_to_buy": units_for_this_week, "grams_to_buy": grams_for_this_week}
+            for week_num, units_for_this_week, grams_for_this_week in self.weekly_plan
+        ]
+        current_week_recommendation = None
+        if 1 <= self.current_week_num <= len(weekly_plan):
+            current_week_recommendation = weekly_plan[self.current_week_num - 1]
+
+        return {
+            "total_allotment_oz": self.total_allotment_oz,
+            "total_allotment_grams": round(self.total_allotment_grams, 2),
+            "total_purchasable_units": self.total_units,
+            "total_grams_purchased_in_cycle": round(self.total_grams_purchased, 2),
+            "grams_leftover_at_end_of_cycle": round(self.grams_leftover, 2),
+            "current_week_recommendation": current_week_recommendation,
+            "full_5_week_plan": weekly_plan
+        }
+
+def plan_cycle(total_allotment_oz: float, start_date_str: str, as_of: datetime.date = None,
+               rule_set=DEFAULT_RULE_SET) -> CyclePlan:
+    """
+    Calculates a 5-week purchasing plan as a CyclePlan.
 
     Args:
         total_allotment_oz: The user's total 35-day allotment in ounces.
         start_date_str: The start date of the 35-day cycle in 'YYYY-MM-DD' format.
+        as_of: The date to locate the current week for. Defaults to today.
+        rule_set: The rule set id (or RuleSet) to plan under. Defaults to
+            Florida's smokable rules; other rule sets may use other cycle
+            lengths and increments.
 
     Returns:
-        A dictionary containing the detailed 5-week plan and the current week's action.
+        The CyclePlan for the cycle, with the as-of date's week already located.
+
+    Raises:
+        ValueError: If the rule set is unknown, the allotment is not a finite
+            positive number (or over the rule set's limit) or the date is
+            malformed.
     """
-    if total_allotment_oz <= 0:
-        return {
-            "error": "Allotment must be a positive number."
-        }
+    metrics = reup_metrics.active
+    if metrics is None:
+        return _plan_cycle(total_allotment_oz, start_date_str, as_of, rule_set)
+    started = time.perf_counter()
     try:
-        start_date = datetime.datetime.strptime(start_date_str, '%Y-%m-%d').date()
-    except ValueError:
-        return {"error": "Invalid date format. Please use YYYY-MM-DD."}
+        plan = _plan_cycle(total_allotment_oz, start_date_str, as_of, rule_set)
+    except ValueError as e:
+        metrics.record("plan_cycle", time.perf_counter() - started, errors=(str(e),))
+        raise
+    metrics.record("plan_cycle", time.perf_counter() - started)
+    return plan
+
+def _plan_cycle(total_allotment_oz: float, start_date_str: str, as_of: datetime.date, rule_set) -> CyclePlan:
+    """plan_cycle without the metrics hook; calculate_purchase_for_cycle records its calls itself."""
+    rules = get_rule_set(rule_set)
+    rules.check_allotment(total_allotment_oz)
+    start_date = parse_start_date(start_date_str)
 
     # 1. Convert total allotment from ounces to grams.
-    total_allotment_grams = total_allotment_oz * OUNCES_TO_GRAMS
+    total_allotment_grams = total_allotment_oz * rules.ounces_to_grams
 
     # 2. Calculate the total number of 3.5g units that can be purchased over 35 days.
     # We use integer division to ensure we don't exceed the allotment.
-    total_units_in_cycle = int(total_allotment_grams // DISPENSARY_INCREMENT_GRAMS)
-
-    # 3. Distribute these units across the 5-week cycle.
-    base_weekly_units = total_units_in_cycle // ALLOTMENT_PERIOD_WEEKS
-    extra_units_to_distribute = total_units_in_cycle % ALLOTMENT_PERIOD_WEEKS
-
-    # 4. Create the full 5-week plan.
-    weekly_plan = []
-    for week_num in range(1, ALLOTMENT_PERIOD_WEEKS + 1):
-        units_for_this_week = base_weekly_units
-        if extra_units_to_distribute > 0:
-            units_for_this_week += 1
-            extra_units_to_distribute -= 1
-        
-        weekly_plan.append({
-            "week": week_num,
-            "units_to_buy": units_for_this_week,
-            "grams_to_buy": units_for_this_week * DISPENSARY_INCREMENT_GRAMS
-        })
-
-    # 5. Determine the current week and the recommendation for it.
-    today = datetime.date.today()
-    days_into_cycle = (today - start_date).days
-    current_week_num = (days_into_cycle // DAYS_IN_WEEK) + 1
-    
-    current_week_recommendation = None
-    if 1 <= current_week_num <= 5:
-        current_week_recommendation = weekly_plan[current_week_num - 1]
+    total_units_in_cycle = int(total_allotment_grams // rules.increment_grams)
+
+    # 3 & 4. Distribute these units across the 5-week cycle. The split depends only
+    # on the unit count, so it comes from the rule set's precomputed plan table.
+    weekly_plan = rules.weekly_plan(total_units_in_cycle)
+
+    # 5. Determine the current week.
+    if as_of is None:
+        as_of = datetime.date.today()
+    days_into_cycle = (as_of - start_date).days
+    current_week_num = (days_into_cycle // rules.days_in_week) + 1
+
+    return CyclePlan(total_allotment_oz, total_allotment_grams, total_units_in_cycle, weekly_plan, current_week_num,
+                     rules)
+
+def calculate_purchase_for_cycle(total_allotment_oz: float, start_date_str: str,
+                                 as_of: datetime.date = None, rule_set=DEFAULT_RULE_SET) -> dict:
+    """
+    Calculates a 5-week purchasing plan and identifies the current week's recommendation.
+
+    Args:
+        total_allotment_oz: The user's total 35-day allotment in ounces.
+        start_date_str: The start date of the 35-day cycle in 'YYYY-MM-DD' format.
+        as_of: The date to locate the current week for. Defaults to today.
+        rule_set: The rule set id (or RuleSet) to plan under; see plan_cycle.
+
+    Returns:
+        A dictionary containing the detailed 5-week plan and the current week's action.
+    """
+    metrics = reup_metrics.active
+    if metrics is not None:
+        started = time.perf_counter()
+    try:
+        result = _plan_cycle(total_allotment_oz, start_date_str, as_of, rule_set).to_dict()
+    except ValueError as e:
+        result = {"error": str(e)}
+    if metrics is not None:
+        metrics.record("calculate_purchase_for_cycle", time.perf_counter() - started,
+                       errors=(result["error"],) if "error" in result else ())
+    return result
 
-    total_grams_purchased = total_units_in_cycle * DISPENSARY_INCREMENT_GRAMS
-    grams_leftover = total_allotment_grams - total_grams_purchased
+_NO_RULE_SET = object()
 
+class _RejectedRows:
+    """Stands in for the allotment lookups of an unknown rule set: every row gets its error message."""
+    __slots__ = ("message",)
+
+    def __init__(self, message: str):
+        self.message = message
+
+    def get(self, total_allotment_oz):
+        return self.message
+
+def calculate_purchase_batch(allotments_oz, start_date_strs, as_of: datetime.date = None,
+                             rule_sets=DEFAULT_RULE_SET) -> dict:
+    """
+    Calculates 5-week purchasing plans for many patients in a single pass.
+
+    Row for row this gives the same numbers as calculate_purchase_for_cycle, but
+    the results come back as columns (typed arrays) instead of one dict per row.
+    A registry repeats the same few allotments and start dates many times, so
+    each distinct value is resolved once per rule set and every row is filled
+    from that.
+
+    Args:
+        allotments_oz: A sequence of total 35-day allotments in ounces.
+        start_date_strs: A sequence of cycle start dates in 'YYYY-MM-DD' format,
+            the same length as allotments_oz.
+        as_of: The date to locate every row's current week for. Defaults to
+            today, read once for the whole batch.
+        rule_sets: One rule set id (or RuleSet) for every row, or a sequence
+            with one per row. Rows under each rule set share that rule set's
+            lookups, so a mixed batch costs the same per row as a single-rule one.
+
+    Returns:
+        A dictionary of columns with one entry per input row:
+            "total_allotment_grams", "total_grams_purchased_in_cycle" and
+            "grams_leftover_at_end_of_cycle": float arrays, rounded as in
+                calculate_purchase_for_cycle.
+            "total_purchasable_units": int array.
+            "weekly_units" / "weekly_grams": lists of arrays, one per week: 5,
+                or as many as the longest cycle among the rule sets used. Rows
+                with shorter cycles have zeros in the extra weeks.
+            "current_week": the week number on the as-of date, or 0 when
+                that date falls outside the cycle or the row has an error.
+            "errors": {row_index: message} for rows the scalar function rejects.
+        Rejected rows are left as zeros in every column.
+    """
+    metrics = reup_metrics.active
+    if metrics is not None:
+        started = time.perf_counter()
+    row_count = len(allotments_oz)
+    if len(start_date_strs) != row_count:
+        raise ValueError("allotments_oz and start_date_strs must be the same length.")
+    if isinstance(rule_sets, (str, RuleSet)):
+        rule_sets = itertools.repeat(rule_sets, row_count)
+    elif len(rule_sets) != row_count:
+        raise ValueError("rule_sets must be one rule set or one per row.")
+
+    as_of_ordinal = (as_of or datetime.date.today()).toordinal()
+
+    allotment_grams_col = array.array('d', [0.0]) * row_count
+    purchased_grams_col = array.array('d', [0.0]) * row_count
+    leftover_grams_col = array.array('d', [0.0]) * row_count
+    units_col = array.array('q', [0]) * row_count
+    default_weeks = get_rule_set(DEFAULT_RULE_SET).period_weeks
+    weekly_units_cols = [array.array('q', [0]) * row_count for _ in range(default_weeks)]
+    weekly_grams_cols = [array.array('d', [0.0]) * row_count for _ in range(default_weeks)]
+    current_week_col = array.array('b', [0]) * row_count
+    errors = {}
+
+    # Per rule set: (RuleSet, allotment lookups, start date lookups). Rows are
+    # only checked for a change of rule set, so a mixed batch does the same
+    # per-row work as a single-rule one.
+    rule_lookups = {}
+    rule_key = _NO_RULE_SET
+
+    for row, (total_allotment_oz, start_date_str, row_rule_key) in enumerate(
+            zip(allotments_oz, start_date_strs, rule_sets)):
+        if row_rule_key is not rule_key:
+            rule_key = row_rule_key
+            lookups = rule_lookups.get(rule_key)
+            if lookups is None:
+                try:
+                    rules = get_rule_set(rule_key)
+                except (TypeError, ValueError) as e:
+                    lookups = (None, _RejectedRows(str(e)), None)
+                else:
+                    lookups = (rules, {}, {})
+                    for _ in range(len(weekly_units_cols), rules.period_weeks):
+                        weekly_units_cols.append(array.array('q', [0]) * row_count)
+                        weekly_grams_cols.append(array.array('d', [0.0]) * row_count)
+                rule_lookups[rule_key] = lookups
+            rules, allotment_cache, week_cache = lookups
+
+        allotment = allotment_cache.get(total_allotment_oz)
+        if allotment is None:
+            try:
+                rules.check_allotment(total_allotment_oz)
+            except ValueError as e:
+                allotment = str(e)
+            else:
+                total_allotment_grams = total_allotment_oz * rules.ounces_to_grams
+                total_units_in_cycle = int(total_allotment_grams // rules.increment_grams)
+                weekly_plan = rules.weekly_plan(total_units_in_cycle)
+                total_grams_purchased = total_units_in_cycle * rules.increment_grams
+                allotment = (
+                    round(total_allotment_grams, 2),
+                    round(total_grams_purchased, 2),
+                    round(total_allotment_grams - total_grams_purchased, 2),
+                    total_units_in_cycle,
+                    tuple(units for _, units, _ in weekly_plan),
+                    tuple(grams for _, _, grams in weekly_plan),
+                )
+            allotment_cache[total_allotment_oz] = allotment
+        if type(allotment) is str:
+            errors[row] = allotment
+            continue
+
+        current_week_num = week_cache.get(start_date_str)
+        if current_week_num is None:
+            try:
+                start_date = parse_start_date(start_date_str)
+            except ValueError:
+                current_week_num = -1
+            else:
+                current_week_num = (as_of_ordinal - start_date.toordinal()) // rules.days_in_week + 1
+                if not 1 <= current_week_num <= rules.period_weeks:
+                    current_week_num = 0
+            week_cache[start_date_str] = current_week_num
+        if current_week_num < 0:
+            errors[row] = "Invalid date format. Please use YYYY-MM-DD."
+            continue
+
+        (allotment_grams_col[row], purchased_grams_col[row], leftover_grams_col[row],
+         units_col[row], weekly_units, weekly_grams) = allotment
+        for week_index in range(len(weekly_units)):
+            weekly_units_cols[week_index][row] = weekly_units[week_index]
+            weekly_grams_cols[week_index][row] = weekly_grams[week_index]
+        current_week_col[row] = current_week_num
+
+    if metrics is not None:
+        metrics.record("calculate_purchase_batch", time.perf_counter() - started, row_count, errors.values())
     return {
-        "total_allotment_oz": total_allotment_oz,
-        "total_allotment_grams": round(total_allotment_grams, 2),
-        "total_purchasable_units": total_units_in_cycle,
-        "total_grams_purchased_in_cycle": round(total_grams_purchased, 2),
-        "grams_leftover_at_end_of_cycle": round(grams_leftover, 2),
-        "current_week_recommendation": current_week_recommendation,
-        "full_5_week_plan": weekly_plan
+        "total_allotment_grams": allotment_grams_col,
+        "total_purchasable_units": units_col,
+        "total_grams_purchased_in_cycle": purchased_grams_col,
+        "grams_leftover_at_end_of_cycle": leftover_grams_col,
+        "weekly_units": weekly_units_cols,
+        "weekly_grams": weekly_grams_cols,
+        "current_week": current_week_col,
+        "errors": errors,
     }
 
 # Example Usage:
 if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1:
+        # Command-line tools, e.g. `python -m reup_calculator plan --in registry.csv --out plans.jsonl`
+        from reup_pipeline import main
+        sys.exit(main())
+
     # This block now serves as a simple test case for the function.
     # The main application logic is in reup_app.py
     print("--- Testing reup_calculator.py ---")
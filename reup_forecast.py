@@ -0,0 +1,219 @@
+"""
+ReUp: Population demand forecast
+
+Turns every patient's plan into a forecast of the units dispensaries will be
+asked for, per day and per week, for stock ordering.
+
+Patients are not planned one by one. They are counted into buckets keyed by
+(cycle start day, units in the cycle), and each bucket's demand is the plan
+for that unit count shifted to its start day. The forecast adds the buckets up
+week of the plan by week of the plan: for each week, the units every bucket
+buys that week are summed onto its start day (a weighted start-day histogram),
+then the histogram is shifted to that week's offset in the cycle. The work
+depends on the number of distinct buckets and days, not on the number of
+patients, and so does the memory.
+
+Assumptions: a plan week's units are bought on the first day of that week,
+and with rollover (the default) every patient starts a new cycle with the same
+allotment as soon as the last one ends.
+"""
+import array
+import collections
+import datetime
+
+from reup_ledger import _to_ordinal
+from reup_rules import DEFAULT_RULE_SET, get_rule_set
+
+
+class DemandForecast:
+    """
+    Counts patients by (cycle start ordinal, units in the cycle) and forecasts their purchases.
+
+    Patients can be added and removed at any time; the forecast always
+    reflects the current buckets. roll_forward merges buckets whose cycles have
+    rolled over, so the bucket count stays bounded as time passes.
+    """
+    def __init__(self, rule_set=DEFAULT_RULE_SET, rollover: bool = True):
+        self.rules = get_rule_set(rule_set)
+        self.rollover = rollover
+        self._buckets = collections.Counter()
+        self._units_cache = {}
+        self._rebased_to = None  # Ordinal passed to the last roll_forward
+
+    def __len__(self):
+        """The number of patients counted."""
+        return sum(self._buckets.values())
+
+    @property
+    def bucket_count(self) -> int:
+        return len(self._buckets)
+
+    def buckets(self) -> dict:
+        """Returns a copy of the {(start_ordinal, units): patient_count} buckets."""
+        return dict(self._buckets)
+
+    def _units(self, total_allotment_oz: float) -> int:
+        units = self._units_cache.get(total_allotment_oz)
+        if units is None:
+            self.rules.check_allotment(total_allotment_oz)
+            units = int(total_allotment_oz * self.rules.ounces_to_grams // self.rules.increment_grams)
+            self._units_cache[total_allotment_oz] = units
+        return units
+
+    def _rebase(self, start_ordinal: int, as_of_ordinal: int) -> int:
+        """Moves a start to the latest cycle start on or before as_of (rollover only)."""
+        if start_ordinal >= as_of_ordinal:
+            return start_ordinal
+        period_days = self.rules.period_days
+        return start_ordinal + (as_of_ordinal - start_ordinal) // period_days * period_days
+
+    def _start_ordinal(self, start_date) -> int:
+        """The bucket start for a cycle start date, after any roll_forward."""
+        start_ordinal = _to_ordinal(start_date)
+        if self.rollover and self._rebased_to is not None:
+            start_ordinal = self._rebase(start_ordinal, self._rebased_to)
+        return start_ordinal
+
+    def _key(self, total_allotment_oz: float, start_date) -> tuple:
+        return self._start_ordinal(start_date), self._units(total_allotment_oz)
+
+    def add_patient(self, total_allotment_oz: float, start_date, count: int = 1):
+        """
+        Counts a patient (or `count` patients with the same allotment and start date).
+
+        Raises:
+            ValueError: If the allotment is not a finite positive number or the date is malformed.
+        """
+        self._buckets[self._key(total_allotment_oz, start_date)] += count
+
+    def remove_patient(self, total_allotment_oz: float, start_date, count: int = 1):
+        """
+        Removes patients added with the same allotment and start date.
+
+        Raises:
+            KeyError: If fewer than `count` such patients were added.
+        """
+        key = self._key(total_allotment_oz, start_date)
+        remaining = self._buckets.get(key, 0) - count
+        if remaining < 0:
+            raise KeyError(f"No patient with allotment {total_allotment_oz} oz and start {start_date}.")
+        if remaining:
+            self._buckets[key] = remaining
+        else:
+            del self._buckets[key]
+
+    def add_patients(self, allotments_oz, start_date_strs) -> dict:
+        """
+        Counts many patients at once.
+
+        Each distinct allotment and start date is resolved once; the rows are
+        then counted into buckets in a single pass.
+
+        Returns:
+            {row_index: message} for rows that were skipped because the
+            allotment or date is invalid.
+        """
+        if len(allotments_oz) != len(start_date_strs):
+            raise ValueError("allotments_oz and start_date_strs must be the same length.")
+
+        units_by_allotment = {}
+        allotment_errors = {}
+        for total_allotment_oz in set(allotments_oz):
+            try:
+                units_by_allotment[total_allotment_oz] = self._units(total_allotment_oz)
+            except ValueError as e:
+                units_by_allotment[total_allotment_oz] = None
+                allotment_errors[total_allotment_oz] = str(e)
+        start_by_date = {}
+        for start_date_str in set(start_date_strs):
+            try:
+                start_by_date[start_date_str] = self._start_ordinal(start_date_str)
+            except ValueError:
+                start_by_date[start_date_str] = None
+
+        counts = collections.Counter(zip(map(start_by_date.__getitem__, start_date_strs),
+                                         map(units_by_allotment.__getitem__, allotments_oz)))
+        rejected = [key for key in counts if None in key]
+        for key in rejected:
+            del counts[key]
+        self._buckets.update(counts)
+
+        # Rows are only located when there is something to report.
+        errors = {}
+        if rejected:
+            for row, (total_allotment_oz, start_date_str) in enumerate(zip(allotments_oz, start_date_strs)):
+                if total_allotment_oz in allotment_errors:
+                    errors[row] = allotment_errors[total_allotment_oz]
+                elif start_by_date[start_date_str] is None:
+                    errors[row] = "Invalid date format. Please use YYYY-MM-DD."
+        return errors
+
+    def roll_forward(self, as_of=None):
+        """
+        Moves every cycle that started before as_of (default today) forward.
+
+        With rollover, each start moves to the patient's latest cycle start on
+        or before as_of, merging buckets that now share a start day; the
+        forecast is unchanged from as_of on. Without rollover, patients whose
+        cycle has ended by as_of are dropped.
+        """
+        as_of_ordinal = _to_ordinal(as_of or datetime.date.today())
+        period_days = self.rules.period_days
+        rolled = collections.Counter()
+        for (start_ordinal, units), count in self._buckets.items():
+            if self.rollover:
+                rolled[self._rebase(start_ordinal, as_of_ordinal), units] += count
+            elif start_ordinal + period_days > as_of_ordinal:
+                rolled[start_ordinal, units] += count
+        self._buckets = rolled
+        if self.rollover:
+            self._rebased_to = max(as_of_ordinal, self._rebased_to or as_of_ordinal)
+
+    def daily_demand(self, first_day, days: int) -> array.array:
+        """
+        Returns the units demanded on each of `days` days from first_day (a date or 'YYYY-MM-DD').
+
+        Returns:
+            An int array; element i is the demand on first_day + i days.
+        """
+        rules = self.rules
+        period_days = rules.period_days
+        first_ordinal = _to_ordinal(first_day)
+        # Index = start day - first_day + period_days, so cycles that began up
+        # to one period before first_day still count.
+        span = days + period_days
+
+        # weighted_starts[w][i]: units bought in plan week w by the buckets starting at index i.
+        weighted_starts = [[0] * span for _ in range(rules.period_weeks)]
+        for (start_ordinal, units), count in self._buckets.items():
+            offset = start_ordinal - first_ordinal
+            if self.rollover and offset < 0:
+                offset = -((-offset) % period_days)
+            if not -period_days < offset < days:
+                continue
+            for week_index, (_, week_units, _) in enumerate(rules.weekly_plan(units)):
+                if week_units:
+                    weighted_starts[week_index][offset + period_days] += week_units * count
+
+        demand = [0] * days
+        for week_index, starts in enumerate(weighted_starts):
+            if self.rollover:
+                # Later cycles repeat each start every period.
+                for index in range(period_days, span):
+                    starts[index] += starts[index - period_days]
+            # Shift to the week's first day: index i lands on day i - period_days + week offset.
+            shift = week_index * rules.days_in_week - period_days
+            first = max(0, -shift)
+            last = min(span, days - shift)
+            for index in range(first, last):
+                demand[index + shift] += starts[index]
+        return array.array('q', demand)
+
+    def weekly_demand(self, first_day, weeks: int) -> array.array:
+        """
+        Returns the units demanded in each of `weeks` 7-day weeks from first_day.
+
+        Weeks are counted from first_day (pass a Monday for calendar weeks).
+        """
+        daily = self.daily_demand(first_day, weeks * 7)
+        return array.array('q', (sum(daily[week * 7:week * 7 + 7]) for week in range(weeks)))
@@ -0,0 +1,199 @@
+"""
+ReUp: Rolling 35-day purchase ledger
+
+Records dated purchases per patient and answers how much of the allotment is
+still available on a given day. Florida counts the allotment over a rolling
+35-day window, so the amount available on day D is the allotment minus
+everything bought in the 35 days ending on D. The window, the unit size and
+the ounce conversion come from the ledger's rule set (default florida_smokable).
+
+Each patient's purchases are kept sorted by day with a running total
+(prefix sum), so a window total is two bisects and a subtraction: O(log n)
+however many years of history the patient has.
+"""
+import bisect
+import datetime
+import itertools
+import math
+
+from reup_calculator import parse_start_date
+from reup_rules import DEFAULT_RULE_SET, get_rule_set
+
+
+def _to_ordinal(day) -> int:
+    """Accepts a datetime.date or a 'YYYY-MM-DD' string."""
+    if isinstance(day, datetime.date):
+        return day.toordinal()
+    return parse_start_date(day).toordinal()
+
+
+def _to_milligrams(grams: float) -> int:
+    if not math.isfinite(grams):
+        raise ValueError("Purchase amount must be a positive number of grams.")
+    milligrams = round(grams * 1000)
+    if milligrams <= 0:
+        raise ValueError("Purchase amount must be a positive number of grams.")
+    return milligrams
+
+
+def _check_allotment(allotment_oz: float):
+    if not math.isfinite(allotment_oz):
+        raise ValueError("Allotment must be a number.")
+    if allotment_oz <= 0:
+        raise ValueError("Allotment must be a positive number.")
+
+
+class PatientLedger:
+    """
+    One patient's allotment and purchase history.
+
+    Purchases are stored as two parallel lists: the day ordinal of each
+    purchase in ascending order, and the cumulative amount bought up to and
+    including it. Amounts are kept as whole milligrams so running totals never
+    drift. Appending a purchase dated on or after the latest one is O(1);
+    a back-dated purchase is inserted in place and the totals after it shifted.
+    """
+    __slots__ = ("allotment_oz", "rules", "_days", "_cumulative_mg")
+
+    def __init__(self, allotment_oz: float, rule_set=DEFAULT_RULE_SET):
+        _check_allotment(allotment_oz)
+        self.allotment_oz = allotment_oz
+        self.rules = get_rule_set(rule_set)
+        self._days = []
+        self._cumulative_mg = []
+
+    def __len__(self):
+        return len(self._days)
+
+    @property
+    def allotment_grams(self) -> float:
+        return self.allotment_oz * self.rules.ounces_to_grams
+
+    def record_purchase(self, day, grams: float):
+        """
+        Records a purchase of `grams` on `day` (a date or 'YYYY-MM-DD' string).
+
+        Raises:
+            ValueError: If grams is not positive or the date is malformed.
+        """
+        milligrams = _to_milligrams(grams)
+        ordinal = _to_ordinal(day)
+        days = self._days
+        totals = self._cumulative_mg
+        if not days or ordinal >= days[-1]:
+            days.append(ordinal)
+            totals.append((totals[-1] if totals else 0) + milligrams)
+            return
+
+        position = bisect.bisect_right(days, ordinal)
+        days.insert(position, ordinal)
+        totals.insert(position, (totals[position - 1] if position else 0) + milligrams)
+        for index in range(position + 1, len(totals)):
+            totals[index] += milligrams
+
+    def record_purchases(self, purchases):
+        """
+        Records many (day, grams) purchases at once.
+
+        The new purchases are merged with the history and the running totals
+        rebuilt once, which is much cheaper than inserting back-dated rows one
+        at a time when loading years of history.
+        """
+        rows = [(_to_ordinal(day), _to_milligrams(grams)) for day, grams in purchases]
+        if not rows:
+            return
+        previous = 0
+        for ordinal, total in zip(self._days, self._cumulative_mg):
+            rows.append((ordinal, total - previous))
+            previous = total
+        rows.sort(key=lambda row: row[0])
+
+        self._days = [ordinal for ordinal, _ in rows]
+        self._cumulative_mg = list(itertools.accumulate(milligrams for _, milligrams in rows))
+
+    def grams_purchased_between(self, first_day, last_day) -> float:
+        """Returns the grams bought from first_day to last_day, both inclusive."""
+        return self._window_mg(_to_ordinal(first_day), _to_ordinal(last_day)) / 1000
+
+    def grams_purchased_in_window(self, as_of=None) -> float:
+        """Returns the grams bought in the rolling window (35 days for Florida) ending on as_of (default today)."""
+        last = _to_ordinal(as_of or datetime.date.today())
+        return self._window_mg(last - self.rules.period_days + 1, last) / 1000
+
+    def remaining_grams(self, as_of=None) -> float:
+        """Returns the allotment still available on as_of (default today), never below zero."""
+        return max(self.allotment_grams - self.grams_purchased_in_window(as_of), 0.0)
+
+    def max_purchasable(self, as_of=None) -> dict:
+        """
+        Returns what the patient can still buy on as_of (default today).
+
+        Returns:
+            A dictionary with the grams bought in the rolling window, the grams
+            remaining, and how many whole units (3.5g for Florida) fit in what remains.
+        """
+        as_of = as_of or datetime.date.today()
+        purchased = self.grams_purchased_in_window(as_of)
+        remaining = max(self.allotment_grams - purchased, 0.0)
+        increment_grams = self.rules.increment_grams
+        units = int(remaining // increment_grams)
+        return {
+            "total_allotment_grams": round(self.allotment_grams, 2),
+            "grams_purchased_in_window": round(purchased, 2),
+            "remaining_grams": round(remaining, 2),
+            "max_purchasable_units": units,
+            "max_purchasable_unit_grams": round(units * increment_grams, 2),
+        }
+
+    def _window_mg(self, first_ordinal: int, last_ordinal: int) -> int:
+        days = self._days
+        end = bisect.bisect_right(days, last_ordinal)
+        start = bisect.bisect_left(days, first_ordinal, 0, end)
+        if end <= start:
+            return 0
+        totals = self._cumulative_mg
+        return totals[end - 1] - (totals[start - 1] if start else 0)
+
+
+class PurchaseLedger:
+    """
+    Purchase ledgers for many patients, keyed by patient id, all under one rule set.
+    """
+    def __init__(self, rule_set=DEFAULT_RULE_SET):
+        self.rules = get_rule_set(rule_set)
+        self._patients = {}
+
+    def __len__(self):
+        return len(self._patients)
+
+    def __contains__(self, patient_id):
+        return patient_id in self._patients
+
+    def patient(self, patient_id) -> PatientLedger:
+        """Returns a patient's ledger. Raises KeyError for unknown patients."""
+        try:
+            return self._patients[patient_id]
+        except KeyError:
+            raise KeyError(f"Unknown patient: {patient_id!r}") from None
+
+    def set_allotment(self, patient_id, allotment_oz: float) -> PatientLedger:
+        """Adds a patient, or updates an existing patient's allotment, and returns their ledger."""
+        ledger = self._patients.get(patient_id)
+        if ledger is None:
+            ledger = self._patients[patient_id] = PatientLedger(allotment_oz, self.rules)
+        else:
+            _check_allotment(allotment_oz)
+            ledger.allotment_oz = allotment_oz
+        return ledger
+
+    def record_purchase(self, patient_id, day, grams: float):
+        self.patient(patient_id).record_purchase(day, grams)
+
+    def record_purchases(self, patient_id, purchases):
+        self.patient(patient_id).record_purchases(purchases)
+
+    def remaining_grams(self, patient_id, as_of=None) -> float:
+        return self.patient(patient_id).remaining_grams(as_of)
+
+    def max_purchasable(self, patient_id, as_of=None) -> dict:
+        return self.patient(patient_id).max_purchasable(as_of)
@@ -0,0 +1,208 @@
+"""
+ReUp: Runtime metrics
+
+Opt-in instrumentation for the planning entry points. While enabled, every
+instrumented call records its latency, the number of rows it planned and the
+rows it rejected, counted by error type. Metrics can be read back as a JSON
+snapshot or as Prometheus text.
+
+Instrumented operations:
+    plan_cycle                    one call per plan, e.g. the planning service's
+                                  /plan and the desktop app's calculations
+    calculate_purchase_for_cycle  one call per plan
+    calculate_purchase_batch      one call per batch; rows are the batch's rows
+    plan_stream                   one call per chunk of a registry run
+    run_plan_parallel             one call per run (worker processes do not report)
+    get_recommendation            the desktop app's Calculate button
+
+Metrics are off by default, and an instrumented function then only checks
+that `active` is None. Enable them with enable(), or by setting REUP_METRICS
+to a file path, which also writes the metrics there when the process exits
+(.json for a snapshot, anything else for Prometheus text). Recording takes a
+lock, so calls from worker threads (the app's live mode) are counted safely.
+
+Usage:
+    import reup_metrics
+    metrics = reup_metrics.enable()
+    ...
+    print(metrics.prometheus_text())
+"""
+import bisect
+import os
+import threading
+
+METRICS_ENV = "REUP_METRICS"
+
+# Error types by the start of the message that reports them. Messages that
+# match none of these are counted as "other". Messages are matched afresh each
+# time rather than memoized: many include user input (a rule set id, the typed
+# allotment), so a memo would grow without bound in a long-running service.
+ERROR_TYPES = (
+    ("invalid_date", "Invalid date format."),
+    ("non_positive_allotment", "Allotment must be a positive number."),
+    ("over_limit", "Allotment exceeds"),
+    ("unknown_rule_set", "Unknown rule set"),
+    ("invalid_allotment", "Allotment must be a number."),
+    ("invalid_allotment", "could not convert string to float"),  # float() on the app's allotment field
+)
+
+# The Metrics being recorded into, or None while metrics are disabled.
+active = None
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram with percentile estimates.
+
+    Buckets grow geometrically from 1 microsecond to about 10 seconds, so
+    recording is a bisect and an increment, and memory never grows with the
+    number of samples. Percentiles report the upper bound of their bucket.
+    """
+    BUCKET_GROWTH = 1.25
+
+    def __init__(self, smallest: float = 1e-6, largest: float = 10.0):
+        self.bounds = []
+        bound = smallest
+        while bound < largest:
+            self.bounds.append(bound)
+            bound *= self.BUCKET_GROWTH
+        self.bounds.append(float("inf"))
+        self.counts = [0] * len(self.bounds)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Returns the latency in seconds below which `fraction` of samples fall."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.bounds, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound if bound != float("inf") else self.bounds[-2]
+        return self.bounds[-2]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 4) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 4),
+            "p99_ms": round(self.percentile(0.99) * 1000, 4),
+        }
+
+
+def error_type(message: str) -> str:
+    """Returns the ERROR_TYPES name for an error message, or "other"."""
+    return next((name for name, prefix in ERROR_TYPES if message.startswith(prefix)), "other")
+
+
+class Metrics:
+    """
+    Call counts, latency histograms, planned rows and error counts per operation.
+    """
+    def __init__(self):
+        self.latency = {}  # operation -> LatencyHistogram; its count is the call count
+        self.rows = {}     # operation -> rows planned, including rejected ones
+        self.errors = {}   # operation -> {error type: rows rejected}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float, rows: int = 1, errors=()):
+        """Records one call that took `seconds`, planned `rows` and rejected rows with the `errors` messages."""
+        with self._lock:
+            histogram = self.latency.get(operation)
+            if histogram is None:
+                histogram = self.latency[operation] = LatencyHistogram()
+                self.rows[operation] = 0
+                self.errors[operation] = {}
+            histogram.record(seconds)
+            self.rows[operation] += rows
+            if errors:
+                counts = self.errors[operation]
+                for message in errors:
+                    name = error_type(message)
+                    counts[name] = counts.get(name, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self.latency.clear()
+            self.rows.clear()
+            self.errors.clear()
+
+    def snapshot(self) -> dict:
+        """Returns the metrics as plain data, ready for json.dumps."""
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self) -> dict:
+        return {
+            operation: {
+                "calls": histogram.count,
+                "rows": self.rows[operation],
+                "errors": dict(sorted(self.errors[operation].items())),
+                "latency": {**histogram.snapshot(), "total_seconds": round(histogram.total, 6)},
+            }
+            for operation, histogram in sorted(self.latency.items())
+        }
+
+    def prometheus_text(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            return self._prometheus_text()
+
+    def _prometheus_text(self) -> str:
+        operations = sorted(self.latency)
+        lines = ["# HELP reup_calls_total Instrumented calls.", "# TYPE reup_calls_total counter"]
+        lines += [f'reup_calls_total{{operation="{op}"}} {self.latency[op].count}' for op in operations]
+        lines += ["# HELP reup_rows_total Rows planned, including rejected rows.", "# TYPE reup_rows_total counter"]
+        lines += [f'reup_rows_total{{operation="{op}"}} {self.rows[op]}' for op in operations]
+        lines += ["# HELP reup_errors_total Rows rejected, by error type.", "# TYPE reup_errors_total counter"]
+        lines += [f'reup_errors_total{{operation="{op}",type="{name}"}} {count}'
+                  for op in operations for name, count in sorted(self.errors[op].items())]
+        lines += ["# HELP reup_latency_seconds Call latency.", "# TYPE reup_latency_seconds histogram"]
+        for op in operations:
+            histogram = self.latency[op]
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.bounds, histogram.counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:.6g}"
+                lines.append(f'reup_latency_seconds_bucket{{operation="{op}",le="{le}"}} {cumulative}')
+            lines.append(f'reup_latency_seconds_sum{{operation="{op}"}} {histogram.total:.9g}')
+            lines.append(f'reup_latency_seconds_count{{operation="{op}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+def enable() -> Metrics:
+    """Starts recording (if not already) and returns the Metrics being recorded into."""
+    global active
+    if active is None:
+        active = Metrics()
+    return active
+
+
+def disable():
+    """Stops recording and returns the Metrics recorded so far, or None if metrics were off."""
+    global active
+    metrics, active = active, None
+    return metrics
+
+
+def write(path: str, metrics: Metrics = None):
+    """Writes `metrics` (default the active ones) to path: a JSON snapshot for .json, else Prometheus text."""
+    metrics = metrics or active or Metrics()
+    with open(path, "w", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            import json  # Only needed when metrics are written
+            json.dump(metrics.snapshot(), f, indent=2)
+        else:
+            f.write(metrics.prometheus_text())
+
+
+if os.environ.get(METRICS_ENV):
+    import atexit
+    atexit.register(write, os.environ[METRICS_ENV], enable())
@@ -0,0 +1,199 @@
+"""
+ReUp: Multi-size purchase optimizer
+
+calculate_purchase_for_cycle plans in 3.5g units only, which usually strands
+a few grams of the allotment. This module plans with a catalog of product
+sizes (for example 1g pre-rolls, 3.5g eighths, 7g quarters and 14g halves)
+and optional per-week caps, and finds the schedule that leaves the least of
+the allotment unused.
+
+The search is exact. Amounts are tracked in tenths of a gram. An unbounded
+knapsack table gives the fewest items for every amount; a bitset DP over the
+weeks then finds the largest total that fits the caps, and the weeks are
+kept close to an even split of that total. Results are cached per
+(allotment, catalog, caps), so identical allotments cost one lookup.
+"""
+import bisect
+import functools
+
+from reup_rules import DEFAULT_RULE_SET, get_rule_set
+
+DEFAULT_CATALOG_GRAMS = (1.0, 3.5, 7.0, 14.0)
+OPTIMIZER_CACHE_SIZE = 1024
+
+# Amounts are integers in units of 0.1g; every product size must be a whole number of these.
+_TENTHS_PER_GRAM = 10
+
+
+def _to_tenths(grams: float, what: str) -> int:
+    tenths = round(grams * _TENTHS_PER_GRAM)
+    if abs(tenths - grams * _TENTHS_PER_GRAM) > 1e-6:
+        raise ValueError(f"{what} must be a multiple of 0.1g.")
+    return tenths
+
+
+@functools.lru_cache(maxsize=64)
+def _catalog_tenths(catalog_grams: tuple) -> tuple:
+    """Validates a catalog and returns its distinct sizes in tenths of a gram, ascending."""
+    sizes = tuple(sorted({_to_tenths(size, "Product sizes") for size in catalog_grams}))
+    if not sizes or sizes[0] <= 0:
+        raise ValueError("The catalog needs at least one positive product size.")
+    return sizes
+
+
+def _fewest_items_table(sizes: tuple, limit: int) -> tuple:
+    """
+    Returns the knapsack table for `sizes` covering at least amounts 0..limit.
+
+    Tables are built for limits rounded up to a power of two, so the handful
+    of tables for a catalog serve every allotment.
+    """
+    return _build_fewest_items_table(sizes, 1 << max(limit, 1).bit_length())
+
+
+@functools.lru_cache(maxsize=64)
+def _build_fewest_items_table(sizes: tuple, limit: int) -> tuple:
+    """
+    Unbounded knapsack over amounts 0..limit (in tenths of a gram).
+
+    Returns:
+        (last_size, reachable_amounts): last_size[amount] is the size to take
+        last in a fewest-items way to buy exactly `amount`, or 0 when the
+        amount cannot be bought; reachable_amounts lists, in ascending order,
+        every amount that can be bought.
+    """
+    unreachable = limit + 1
+    fewest = [0] + [unreachable] * limit
+    last_size = [0] * (limit + 1)
+    for amount in range(1, limit + 1):
+        best = unreachable
+        for size in sizes:
+            if size <= amount and fewest[amount - size] + 1 < best:
+                best = fewest[amount - size] + 1
+                last_size[amount] = size
+        fewest[amount] = best
+
+    reachable_amounts = tuple(amount for amount in range(limit + 1) if fewest[amount] < unreachable)
+    return tuple(last_size), reachable_amounts
+
+
+@functools.lru_cache(maxsize=OPTIMIZER_CACHE_SIZE)
+def _optimize_tenths(allotment: int, sizes: tuple, caps: tuple) -> tuple:
+    """
+    Finds the best schedule for an allotment, all amounts in tenths of a gram.
+
+    Returns:
+        A tuple with one entry per week, each a tuple of (size, count) pairs.
+    """
+    last_size, reachable_amounts = _fewest_items_table(sizes, min(max(caps), allotment))
+
+    # week_amounts[w]: amounts week w can buy on its own, ascending.
+    # totals[w]: bitmask of cumulative totals reachable after weeks 0..w-1.
+    full_mask = (1 << (allotment + 1)) - 1
+    week_amounts = [reachable_amounts[:bisect.bisect_right(reachable_amounts, min(cap, allotment))] for cap in caps]
+    totals = [1]
+    for amounts in week_amounts:
+        previous = totals[-1]
+        reached = 0
+        for amount in amounts:
+            reached |= previous << amount
+        totals.append(reached & full_mask)
+
+    # Walk back from the best total. Each week, from the last, takes the
+    # largest amount at or below an even share of what is left (or the
+    # smallest above it if none fits), provided the earlier weeks can still
+    # make up the rest. Like the 3.5g plan, earlier weeks end up the larger ones.
+    remaining = totals[-1].bit_length() - 1
+    schedule = []
+    for week in range(len(caps) - 1, -1, -1):
+        target = remaining / (week + 1)
+        below = above = None
+        for amount in week_amounts[week]:
+            if amount > remaining:
+                break
+            if totals[week] >> (remaining - amount) & 1:
+                if amount <= target:
+                    below = amount
+                elif above is None:
+                    above = amount
+        best_amount = below if below is not None else above
+        remaining -= best_amount
+
+        counts = {}
+        amount = best_amount
+        while amount:
+            counts[last_size[amount]] = counts.get(last_size[amount], 0) + 1
+            amount -= last_size[amount]
+        schedule.append(tuple(sorted(counts.items(), reverse=True)))
+    schedule.reverse()
+    return tuple(schedule)
+
+
+def optimize_purchase_for_cycle(total_allotment_oz: float, catalog_grams=DEFAULT_CATALOG_GRAMS,
+                                weekly_caps_grams=None, rule_set=DEFAULT_RULE_SET) -> dict:
+    """
+    Plans a cycle from a catalog of product sizes, leaving as little of the allotment unused as possible.
+
+    Args:
+        total_allotment_oz: The user's total allotment for one cycle, in ounces.
+        catalog_grams: The product sizes available, in grams (multiples of 0.1g).
+        weekly_caps_grams: Optional maximum grams to buy in each week of the
+            cycle. Without caps, weeks are only limited by the allotment and
+            are kept as even as possible.
+        rule_set: The rule set giving the ounce conversion and the weeks per
+            cycle (default florida_smokable, a 5-week cycle).
+
+    Returns:
+        A dictionary with the allotment totals and a "full_5_week_plan" whose
+        weeks list the items to buy as {"grams": size, "count": n}, largest
+        size first. Invalid input returns {"error": message}.
+    """
+    try:
+        rules = get_rule_set(rule_set)
+        rules.check_allotment(total_allotment_oz)
+        sizes = _catalog_tenths(tuple(catalog_grams))
+        total_allotment_grams = total_allotment_oz * rules.ounces_to_grams
+        allotment = int(total_allotment_grams * _TENTHS_PER_GRAM + 1e-9)
+        if weekly_caps_grams is None:
+            caps = (allotment,) * rules.period_weeks
+        else:
+            caps = tuple(int(cap * _TENTHS_PER_GRAM + 1e-9) for cap in weekly_caps_grams)
+            if len(caps) != rules.period_weeks or min(caps) < 0:
+                raise ValueError(f"Provide {rules.period_weeks} non-negative weekly caps.")
+    except ValueError as e:
+        return {"error": str(e)}
+
+    schedule = _optimize_tenths(allotment, sizes, caps)
+
+    weekly_plan = []
+    total_tenths = 0
+    for week_num, items in enumerate(schedule, start=1):
+        week_tenths = sum(size * count for size, count in items)
+        total_tenths += week_tenths
+        weekly_plan.append({
+            "week": week_num,
+            "items": [{"grams": size / _TENTHS_PER_GRAM, "count": count} for size, count in items],
+            "grams_to_buy": week_tenths / _TENTHS_PER_GRAM
+        })
+
+    total_grams_purchased = total_tenths / _TENTHS_PER_GRAM
+    return {
+        "total_allotment_oz": total_allotment_oz,
+        "total_allotment_grams": round(total_allotment_grams, 2),
+        "catalog_grams": [size / _TENTHS_PER_GRAM for size in sizes],
+        "total_grams_purchased_in_cycle": round(total_grams_purchased, 2),
+        "grams_leftover_at_end_of_cycle": round(total_allotment_grams - total_grams_purchased, 2),
+        "full_5_week_plan": weekly_plan
+    }
+
+
+def optimizer_cache_info():
+    """Returns hits, misses, maxsize and currsize of the per-allotment schedule cache."""
+    return _optimize_tenths.cache_info()
+
+
+def optimizer_cache_clear():
+    """Empties the schedule cache and the knapsack tables."""
+    _optimize_tenths.cache_clear()
+    _catalog_tenths.cache_clear()
+    _build_fewest_items_table.cache_clear()
@@ -0,0 +1,456 @@
+"""
+ReUp: Streaming plan generation for registry exports
+
+Reads (patient_id, allotment_oz, cycle_start) rows from a CSV or JSONL file,
+plans them in fixed-size chunks with calculate_purchase_batch and writes one
+plan per row to a CSV or JSONL file. Every stage is a generator, so memory use
+depends on the chunk size and not on the size of the input file.
+
+For large files, run_plan_parallel (or --workers) splits the input into
+byte-range shards and plans them on a process pool. Every row of a run is
+planned under one rule set (--rule-set, default florida_smokable).
+
+Usage:
+    python -m reup_calculator plan --in registry.csv --out plans.jsonl
+    python -m reup_calculator plan --in registry.csv --out plans.jsonl --workers 0
+    python -m reup_calculator plan --in registry.csv --out plans.csv --rule-set florida_smokable
+"""
+import argparse
+import concurrent.futures
+import csv
+import datetime
+import itertools
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import reup_metrics
+from reup_calculator import calculate_purchase_batch
+from reup_rules import DEFAULT_RULE_SET, available_rule_sets, get_rule_set
+
+INPUT_FIELDS = ("patient_id", "allotment_oz", "cycle_start")
+DEFAULT_CHUNK_SIZE = 50_000
+PROGRESS_INTERVAL_SECONDS = 2.0
+ENCODED_TAIL_CACHE_SIZE = 4096
+SHARDS_PER_WORKER = 4
+PART_COPY_BUFFER_SIZE = 1 << 20
+
+
+def output_fields(period_weeks: int = None) -> tuple:
+    """Returns the output columns for a rule set with `period_weeks` weeks per cycle (default florida_smokable's)."""
+    if period_weeks is None:
+        period_weeks = get_rule_set(DEFAULT_RULE_SET).period_weeks
+    return (
+        ("patient_id", "total_allotment_grams", "total_purchasable_units",
+         "total_grams_purchased_in_cycle", "grams_leftover_at_end_of_cycle", "current_week")
+        + tuple(f"week_{week_num}_units" for week_num in range(1, period_weeks + 1))
+        + ("error",)
+    )
+
+
+OUTPUT_FIELDS = output_fields()
+
+
+def _file_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported file type '{extension}'. Use .csv or .jsonl.")
+
+
+def read_registry(path: str, byte_range=None):
+    """
+    Yields (patient_id, allotment_oz, cycle_start) tuples from a CSV or JSONL file.
+
+    CSV files need a header row naming the INPUT_FIELDS columns. Values are
+    yielded as read; conversion happens when the chunk is planned.
+
+    Args:
+        path: The .csv or .jsonl file to read.
+        byte_range: Optional (start, end) offsets from shard_byte_ranges; only
+            the lines starting inside that range are read.
+    """
+    file_format = _file_format(path)
+    with open(path, "rb") as f:
+        if file_format == "csv":
+            header = next(csv.reader([f.readline().decode("utf-8-sig")]), [])
+            missing = [field for field in INPUT_FIELDS if field not in header]
+            if missing:
+                raise ValueError(f"{path}: missing column(s) {', '.join(missing)}.")
+            id_col, allotment_col, start_col = (header.index(field) for field in INPUT_FIELDS)
+            row_width = max(id_col, allotment_col, start_col) + 1
+
+        if byte_range is None:
+            lines = (line.decode("utf-8") for line in f)
+        else:
+            lines = _lines_in_range(f, *byte_range)
+
+        if file_format == "csv":
+            for row in csv.reader(lines):
+                if not row:
+                    continue
+                if len(row) < row_width:
+                    row += [""] * (row_width - len(row))  # Missing values are planned as error rows
+                yield row[id_col], row[allotment_col], row[start_col]
+        else:
+            for line in lines:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError(f"{path}: each line must be a JSON object.")
+                try:
+                    values = row["patient_id"], row["allotment_oz"], row["cycle_start"]
+                except KeyError as e:
+                    raise ValueError(f"{path}: record missing field {e}.") from None
+                yield values
+
+
+def _lines_in_range(f, start: int, end: int):
+    """Yields decoded lines of a binary file whose first byte lies in [start, end)."""
+    f.seek(start)
+    position = start
+    for line in f:
+        if position >= end:
+            return
+        position += len(line)
+        yield line.decode("utf-8")
+
+
+def shard_byte_ranges(path: str, shard_count: int):
+    """
+    Splits a registry file into at most shard_count (start, end) byte ranges.
+
+    Every boundary is moved forward to the start of a line, and for CSV files
+    the first range starts after the header, so each record falls into exactly
+    one range. Quoted CSV fields containing newlines are not supported.
+    """
+    with open(path, "rb") as f:
+        if _file_format(path) == "csv":
+            f.readline()
+        data_start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+
+        boundaries = [data_start]
+        for shard in range(1, shard_count):
+            offset = data_start + (size - data_start) * shard // shard_count
+            if offset <= boundaries[-1]:
+                continue
+            f.seek(offset - 1)
+            f.readline()  # Finish the line the offset landed in.
+            boundary = f.tell()
+            if boundaries[-1] < boundary < size:
+                boundaries.append(boundary)
+        boundaries.append(size)
+
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end]
+
+
+def chunked(rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yields lists of at most chunk_size items from any iterable."""
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def plan_chunk(chunk, as_of: datetime.date = None, rule_set=DEFAULT_RULE_SET):
+    """
+    Plans one chunk of registry rows and yields an output record per row.
+
+    The current week is located for as_of (default today), and every row is
+    planned under rule_set.
+
+    Records are dicts keyed by output_fields(); rows that cannot be planned
+    carry the calculator's message in "error" and leave the plan fields empty.
+    """
+    patient_ids = []
+    allotments_oz = []
+    start_date_strs = []
+    parse_errors = {}
+    for row, (patient_id, allotment_oz, cycle_start) in enumerate(chunk):
+        patient_ids.append(patient_id)
+        try:
+            allotment_oz = float(allotment_oz)
+        except (TypeError, ValueError):
+            allotment_oz = float("nan")
+        if math.isfinite(allotment_oz):
+            allotments_oz.append(allotment_oz)
+        else:  # Unparseable, or "inf"/"nan", which float() accepts
+            allotments_oz.append(0.0)
+            parse_errors[row] = "Allotment must be a number."
+        if isinstance(cycle_start, str):
+            start_date_strs.append(cycle_start)
+        else:  # e.g. a number or null in a JSONL record
+            start_date_strs.append("")
+            parse_errors.setdefault(row, "Invalid date format. Please use YYYY-MM-DD.")
+
+    columns = calculate_purchase_batch(allotments_oz, start_date_strs, as_of, rule_set)
+    errors = columns["errors"]
+    errors.update(parse_errors)
+    weekly_units = columns["weekly_units"]
+    period_weeks = get_rule_set(rule_set).period_weeks
+
+    for row, patient_id in enumerate(patient_ids):
+        if row in errors:
+            yield {"patient_id": patient_id, "error": errors[row]}
+            continue
+        record = {
+            "patient_id": patient_id,
+            "total_allotment_grams": columns["total_allotment_grams"][row],
+            "total_purchasable_units": columns["total_purchasable_units"][row],
+            "total_grams_purchased_in_cycle": columns["total_grams_purchased_in_cycle"][row],
+            "grams_leftover_at_end_of_cycle": columns["grams_leftover_at_end_of_cycle"][row],
+            "current_week": columns["current_week"][row] or None,
+        }
+        for week_index in range(period_weeks):
+            record[f"week_{week_index + 1}_units"] = weekly_units[week_index][row]
+        yield record
+
+
+def plan_stream(rows, chunk_size: int = DEFAULT_CHUNK_SIZE, as_of: datetime.date = None,
+                rule_set=DEFAULT_RULE_SET):
+    """
+    Yields lists of output records, one list per chunk of input rows.
+
+    The clock is read once up front when as_of is not given, so every chunk
+    shares the same as-of date even if the run crosses midnight.
+    """
+    as_of = as_of or datetime.date.today()
+    for chunk in chunked(rows, chunk_size):
+        metrics = reup_metrics.active
+        if metrics is None:
+            yield list(plan_chunk(chunk, as_of, rule_set))
+            continue
+        started = time.perf_counter()
+        records = list(plan_chunk(chunk, as_of, rule_set))
+        metrics.record("plan_stream", time.perf_counter() - started, len(records),
+                       [record["error"] for record in records if "error" in record])
+        yield records
+
+
+def write_plans(record_chunks, out_file, file_format: str, write_header: bool = True,
+                fieldnames: tuple = OUTPUT_FIELDS):
+    """
+    Writes chunks of output records to an open text file.
+
+    fieldnames are the CSV columns; pass output_fields(period_weeks) for rule
+    sets whose cycles are not 5 weeks long.
+
+    Yields the number of records written after each chunk, so callers can
+    report progress while the stream is consumed.
+    """
+    if file_format == "csv":
+        writer = csv.DictWriter(out_file, fieldnames=fieldnames, lineterminator="\n")
+        if write_header:
+            writer.writeheader()
+        for records in record_chunks:
+            writer.writerows(records)
+            yield len(records)
+    else:
+        dumps = json.JSONEncoder(separators=(",", ":")).encode
+        # Everything after patient_id repeats across rows with the same
+        # allotment and current week, so each distinct tail is encoded once.
+        encoded_tails = {}
+        for records in record_chunks:
+            lines = []
+            for record in records:
+                values = iter(record.items())
+                _, patient_id = next(values)
+                tail_key = tuple(values)
+                tail = encoded_tails.get(tail_key)
+                if tail is None:
+                    if len(encoded_tails) >= ENCODED_TAIL_CACHE_SIZE:
+                        encoded_tails.clear()
+                    tail = encoded_tails[tail_key] = dumps(dict(tail_key))[1:]
+                lines.append('{"patient_id":' + dumps(patient_id) + "," + tail + "\n")
+            out_file.write("".join(lines))
+            yield len(records)
+
+
+class ProgressReporter:
+    """
+    Prints rows processed and rows/sec to a stream at most every `interval` seconds.
+    """
+    def __init__(self, stream=sys.stderr, interval: float = PROGRESS_INTERVAL_SECONDS):
+        self.stream = stream
+        self.interval = interval
+        self.rows = 0
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def update(self, rows: int):
+        self.rows += rows
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self._print(now)
+
+    def finish(self):
+        self._print(time.perf_counter(), final=True)
+
+    def _print(self, now: float, final: bool = False):
+        elapsed = max(now - self.started, 1e-9)
+        label = "done" if final else "progress"
+        print(f"[{label}] {self.rows:,} rows in {elapsed:.1f}s ({self.rows / elapsed:,.0f} rows/sec)",
+              file=self.stream, flush=True)
+
+
+def run_plan(in_path: str, out_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, progress=None,
+             as_of: datetime.date = None, rule_set=DEFAULT_RULE_SET) -> int:
+    """
+    Streams a registry file through the planner into an output file.
+
+    Current weeks are located for as_of, which defaults to today, and every
+    row is planned under rule_set.
+
+    Returns:
+        The number of rows written.
+    """
+    out_format = _file_format(out_path)
+    rules = get_rule_set(rule_set)  # Unknown rule sets fail here, before the output is created
+    rows = read_registry(in_path)
+    with open(out_path, "w", newline="", encoding="utf-8") as out_file:
+        written = 0
+        for count in write_plans(plan_stream(rows, chunk_size, as_of, rules), out_file, out_format,
+                                 fieldnames=output_fields(rules.period_weeks)):
+            written += count
+            if progress:
+                progress.update(count)
+    if progress:
+        progress.finish()
+    return written
+
+
+def _plan_shard(in_path: str, byte_range, part_path: str, chunk_size: int, as_of: datetime.date,
+                rules) -> int:
+    """Worker entry point: plans one byte range of the input into a part file."""
+    rows = read_registry(in_path, byte_range)
+    with open(part_path, "w", newline="", encoding="utf-8") as out_file:
+        written = 0
+        for count in write_plans(plan_stream(rows, chunk_size, as_of, rules), out_file, _file_format(part_path),
+                                 write_header=False, fieldnames=output_fields(rules.period_weeks)):
+            written += count
+    return written
+
+
+def run_plan_parallel(in_path: str, out_path: str, workers: int = None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, shards_per_worker: int = SHARDS_PER_WORKER,
+                      progress=None, as_of: datetime.date = None, rule_set=DEFAULT_RULE_SET) -> int:
+    """
+    Plans a registry file on a pool of worker processes.
+
+    The input is split into byte-range shards (see shard_byte_ranges), each
+    worker writes its shard to a part file next to the output, and the parts
+    are concatenated in shard order, so the output is identical to run_plan's
+    whatever the worker count or completion order.
+
+    Args:
+        workers: Number of processes; defaults to os.cpu_count().
+        shards_per_worker: Shards per process. More, smaller shards even out
+            uneven row lengths at the cost of a few extra part files.
+        as_of: The date to locate current weeks for. Defaults to today, read
+            once here and shared by every worker.
+        rule_set: The rule set every row is planned under. It is compiled
+            here and sent to the workers, so rule sets registered in code
+            work too.
+
+    Metrics record the run as a whole; the workers' own calls are not
+    recorded.
+
+    Returns:
+        The number of rows written.
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    as_of = as_of or datetime.date.today()
+    rules = get_rule_set(rule_set)
+    out_format = _file_format(out_path)
+    byte_ranges = shard_byte_ranges(in_path, workers * shards_per_worker)
+
+    part_dir = tempfile.mkdtemp(prefix=".reup-shards-", dir=os.path.dirname(os.path.abspath(out_path)))
+    try:
+        extension = os.path.splitext(out_path)[1]
+        part_paths = [os.path.join(part_dir, f"part-{index:05d}{extension}") for index in range(len(byte_ranges))]
+
+        written = 0
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_plan_shard, in_path, byte_range, part_path, chunk_size, as_of, rules)
+                       for byte_range, part_path in zip(byte_ranges, part_paths)]
+            for future in concurrent.futures.as_completed(futures):
+                count = future.result()
+                written += count
+                if progress:
+                    progress.update(count)
+
+        with open(out_path, "w", newline="", encoding="utf-8") as out_file:
+            if out_format == "csv":
+                csv.writer(out_file, lineterminator="\n").writerow(output_fields(rules.period_weeks))
+            for part_path in part_paths:
+                with open(part_path, "r", newline="", encoding="utf-8") as part_file:
+                    shutil.copyfileobj(part_file, out_file, PART_COPY_BUFFER_SIZE)
+    finally:
+        shutil.rmtree(part_dir, ignore_errors=True)
+
+    if progress:
+        progress.finish()
+    metrics = reup_metrics.active
+    if metrics is not None:
+        metrics.record("run_plan_parallel", time.perf_counter() - started, written)
+    return written
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m reup_calculator",
+                                     description="ReUp allotment calculator tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = commands.add_parser("plan", help="Generate 5-week plans for a registry export.")
+    plan_parser.add_argument("--in", dest="in_path", required=True,
+                             help="Input .csv or .jsonl with patient_id, allotment_oz, cycle_start.")
+    plan_parser.add_argument("--out", dest="out_path", required=True, help="Output .csv or .jsonl file.")
+    plan_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                             help=f"Rows planned per chunk (default {DEFAULT_CHUNK_SIZE:,}).")
+    plan_parser.add_argument("--workers", type=int, default=1,
+                             help="Worker processes; 0 uses every CPU (default 1, no pool).")
+    plan_parser.add_argument("--as-of", type=datetime.date.fromisoformat, default=None, metavar="YYYY-MM-DD",
+                             help="Locate current weeks for this date instead of today.")
+    plan_parser.add_argument("--rule-set", default=DEFAULT_RULE_SET, metavar="ID",
+                             help=f"Rule set to plan under (default {DEFAULT_RULE_SET}; "
+                                  f"available: {', '.join(available_rule_sets())}).")
+    plan_parser.add_argument("--metrics", dest="metrics_path", metavar="PATH",
+                             help="Write planning metrics to PATH (.json for JSON, else Prometheus text).")
+    plan_parser.add_argument("--quiet", action="store_true", help="Do not report progress.")
+
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1.")
+    if args.workers < 0:
+        parser.error("--workers must be 0 or more.")
+    progress = None if args.quiet else ProgressReporter()
+    metrics = reup_metrics.enable() if args.metrics_path else None
+    try:
+        if args.workers == 1:
+            run_plan(args.in_path, args.out_path, args.chunk_size, progress=progress, as_of=args.as_of,
+                     rule_set=args.rule_set)
+        else:
+            run_plan_parallel(args.in_path, args.out_path, args.workers or None, args.chunk_size,
+                              progress=progress, as_of=args.as_of, rule_set=args.rule_set)
+        if metrics is not None:
+            reup_metrics.write(args.metrics_path, metrics)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+ReUp: Jurisdiction rule sets
+
+A rule set holds the numbers a plan is built from: how an allotment in ounces
+converts to grams, the size of one purchasable unit, how many weeks a cycle
+spans and, optionally, the largest allotment the rules allow. Rule sets are
+JSON files in the rules/ directory next to this module, one per id.
+florida_smokable.json matches the reup_calculator module constants and is
+the default everywhere.
+
+Each file is compiled once into an immutable RuleSet whose weekly plans are
+precomputed for every unit count up to PLAN_TABLE_UNITS, so planning under
+any rule set is a table lookup. Plans for larger unit counts (over about
+31 oz under the default rules) are built on demand.
+
+Rule file fields:
+    id                 the rule set id; must match the file name
+    name               a display name
+    ounces_to_grams    grams per ounce of allotment
+    increment_grams    grams in one purchasable unit
+    period_weeks       weeks in one allotment cycle
+    days_in_week       optional, default 7
+    max_allotment_oz   optional; larger allotments are rejected
+"""
+import math
+import os
+
+RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules")
+DEFAULT_RULE_SET = "florida_smokable"
+
+# Unit counts with a precomputed plan in every rule set (unless max_allotment_oz
+# needs more). Larger counts are planned on demand.
+PLAN_TABLE_UNITS = 256
+_REQUIRED_FIELDS = ("id", "name", "ounces_to_grams", "increment_grams", "period_weeks")
+
+# Compiled rule sets by id; filled on first use of each id.
+_rule_sets = {}
+
+
+def split_units_evenly(total_units: int, period_weeks: int, increment_grams: float) -> tuple:
+    """
+    Splits a cycle's purchasable units evenly across its weeks.
+
+    Earlier weeks take the remainder, one extra unit each.
+
+    Returns:
+        A tuple of (week, units_to_buy, grams_to_buy) tuples, one per week.
+    """
+    base_weekly_units, extra_units = divmod(total_units, period_weeks)
+    weekly_plan = []
+    for week_num in range(1, period_weeks + 1):
+        units_for_this_week = base_weekly_units + (1 if week_num <= extra_units else 0)
+        weekly_plan.append((week_num, units_for_this_week, units_for_this_week * increment_grams))
+    return tuple(weekly_plan)
+
+
+class RuleSet:
+    """
+    An immutable, compiled rule set.
+
+    Attributes:
+        id, name, ounces_to_grams, increment_grams, period_weeks, days_in_week,
+        max_allotment_oz: As in the rule file (max_allotment_oz may be None).
+        period_days: Days in one cycle.
+        plan_table: plan_table[units] is the weekly plan for that many units.
+    """
+    __slots__ = ("id", "name", "ounces_to_grams", "increment_grams", "period_weeks", "days_in_week",
+                 "max_allotment_oz", "period_days", "plan_table")
+
+    def __init__(self, id: str, name: str, ounces_to_grams: float, increment_grams: float, period_weeks: int,
+                 days_in_week: int = 7, max_allotment_oz: float = None):
+        if ounces_to_grams <= 0 or increment_grams <= 0:
+            raise ValueError(f"Rule set '{id}': ounces_to_grams and increment_grams must be positive.")
+        if period_weeks < 1 or days_in_week < 1:
+            raise ValueError(f"Rule set '{id}': period_weeks and days_in_week must be at least 1.")
+        if max_allotment_oz is not None and max_allotment_oz <= 0:
+            raise ValueError(f"Rule set '{id}': max_allotment_oz must be positive.")
+
+        table_units = PLAN_TABLE_UNITS
+        if max_allotment_oz is not None:
+            table_units = max(table_units, int(max_allotment_oz * ounces_to_grams // increment_grams) + 1)
+        # Plans for neighbouring unit counts repeat most weekly rows; share them.
+        rows = {}
+        plan_table = tuple(
+            tuple(rows.setdefault(row, row) for row in split_units_evenly(units, period_weeks, increment_grams))
+            for units in range(table_units)
+        )
+
+        for attribute, value in (("id", id), ("name", name), ("ounces_to_grams", ounces_to_grams),
+                                 ("increment_grams", increment_grams), ("period_weeks", period_weeks),
+                                 ("days_in_week", days_in_week), ("max_allotment_oz", max_allotment_oz),
+                                 ("period_days", period_weeks * days_in_week), ("plan_table", plan_table)):
+            object.__setattr__(self, attribute, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"RuleSet is immutable; cannot set '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"RuleSet is immutable; cannot delete '{name}'")
+
+    def __reduce__(self):
+        # Pickled (e.g. for worker processes) as its definition; the plan table is rebuilt on load.
+        return (RuleSet, (self.id, self.name, self.ounces_to_grams, self.increment_grams, self.period_weeks,
+                          self.days_in_week, self.max_allotment_oz))
+
+    def __repr__(self):
+        return f"RuleSet(id={self.id!r}, period_weeks={self.period_weeks}, increment_grams={self.increment_grams})"
+
+    def weekly_plan(self, total_units: int) -> tuple:
+        """Returns the (week, units_to_buy, grams_to_buy) rows for a cycle's unit count."""
+        if total_units < len(self.plan_table):
+            return self.plan_table[total_units]
+        return split_units_evenly(total_units, self.period_weeks, self.increment_grams)
+
+    def check_allotment(self, total_allotment_oz: float):
+        """Raises ValueError if the allotment is not a finite positive number or exceeds the rule set's limit."""
+        if not math.isfinite(total_allotment_oz):
+            raise ValueError("Allotment must be a number.")
+        if total_allotment_oz <= 0:
+            raise ValueError("Allotment must be a positive number.")
+        if self.max_allotment_oz is not None and total_allotment_oz > self.max_allotment_oz:
+            raise ValueError(f"Allotment exceeds the {self.max_allotment_oz} oz limit for {self.name}.")
+
+
+def compile_rule_set(definition: dict) -> RuleSet:
+    """
+    Compiles a rule definition (the contents of a rule file) into a RuleSet.
+
+    Raises:
+        ValueError: If a required field is missing or a value is out of range.
+    """
+    missing = [field for field in _REQUIRED_FIELDS if field not in definition]
+    if missing:
+        raise ValueError(f"Rule set is missing field(s) {', '.join(missing)}.")
+    try:
+        return RuleSet(
+            str(definition["id"]), str(definition["name"]), float(definition["ounces_to_grams"]),
+            float(definition["increment_grams"]), int(definition["period_weeks"]),
+            int(definition.get("days_in_week", 7)),
+            None if definition.get("max_allotment_oz") is None else float(definition["max_allotment_oz"]),
+        )
+    except TypeError:
+        raise ValueError(f"Rule set '{definition['id']}' has a non-numeric value.") from None
+
+
+def load_rule_set(rule_set_id: str, rules_dir: str = RULES_DIR) -> RuleSet:
+    """
+    Reads and compiles rules_dir/<rule_set_id>.json.
+
+    Raises:
+        ValueError: If there is no such rule file or it is invalid.
+    """
+    import json # Only needed the first time each rule set is used; keeps it off the app's startup path
+    if not rule_set_id.replace("_", "").isalnum():
+        raise ValueError(f"Unknown rule set '{rule_set_id}'.")
+    path = os.path.join(rules_dir, rule_set_id + ".json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            definition = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"Unknown rule set '{rule_set_id}'.") from None
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"{path}: {e}") from None
+    if not isinstance(definition, dict):
+        raise ValueError(f"{path}: a rule file must hold one JSON object.")
+    rule_set = compile_rule_set(definition)
+    if rule_set.id != rule_set_id:
+        raise ValueError(f"{path}: id '{rule_set.id}' does not match the file name.")
+    return rule_set
+
+
+def get_rule_set(rule_set=DEFAULT_RULE_SET) -> RuleSet:
+    """
+    Returns the compiled rule set for an id, loading it on first use.
+
+    A RuleSet is returned as is, so callers can pass either.
+
+    Raises:
+        ValueError: For unknown ids.
+    """
+    compiled = _rule_sets.get(rule_set)
+    if compiled is not None:
+        return compiled
+    if isinstance(rule_set, RuleSet):
+        return rule_set
+    if not isinstance(rule_set, str):
+        raise ValueError(f"Unknown rule set {rule_set!r}.")
+    compiled = _rule_sets[rule_set] = load_rule_set(rule_set)
+    return compiled
+
+
+def register_rule_set(rule_set: RuleSet):
+    """Makes a rule set built in code available by its id, replacing any loaded from file."""
+    _rule_sets[rule_set.id] = rule_set
+
+
+def available_rule_sets(rules_dir: str = RULES_DIR) -> list:
+    """Returns the ids of the rule files in rules_dir and of registered rule sets, sorted."""
+    ids = set(_rule_sets)
+    if os.path.isdir(rules_dir):
+        ids.update(name[:-len(".json")] for name in os.listdir(rules_dir) if name.endswith(".json"))
+    return sorted(ids)
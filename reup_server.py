@@ -0,0 +1,306 @@
+"""
+ReUp: Local HTTP planning service
+
+A small asyncio HTTP/1.1 server that answers plan lookups as JSON, for
+point-of-sale terminals that cannot embed the desktop app. It uses only the
+standard library and supports keep-alive connections.
+
+Endpoints:
+    GET  /plan?allotment_oz=3.25&start_date=2025-01-01[&as_of=2025-01-20][&rule_set=florida_smokable]
+        One plan, in the calculate_purchase_for_cycle dictionary shape.
+    POST /plan/batch
+        Body: {"as_of": "YYYY-MM-DD" (optional), "rule_set": id (optional),
+               "patients": [{"patient_id": ..., "allotment_oz": ..., "start_date": ...,
+                             "rule_set": id (optional)}, ...]}
+        Returns {"plans": [...]} in request order; each plan echoes patient_id.
+        A patient's rule_set overrides the batch's, which defaults to florida_smokable.
+        Batches are planned on a worker thread, so they do not hold up other connections.
+    GET  /stats
+        Request counts and p50/p99 latency per endpoint.
+    GET  /metrics[?format=json]
+        Planning metrics (see reup_metrics) as Prometheus text, or as JSON.
+        Only served when the service runs with --metrics.
+    GET  /health
+
+Usage:
+    python reup_server.py --host 127.0.0.1 --port 8035 [--metrics]
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import reup_metrics
+from reup_calculator import calculate_purchase_for_cycle, plan_cycle
+from reup_metrics import LatencyHistogram
+from reup_rules import DEFAULT_RULE_SET
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8035
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 8 * 1024 * 1024
+MAX_BATCH_SIZE = 10_000
+KEEP_ALIVE_TIMEOUT_SECONDS = 30.0
+
+# Batch requests are planned on this many worker threads instead of the event
+# loop, so a 10,000-patient batch does not stall every other connection.
+BATCH_WORKERS = 1
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _parse_as_of(value):
+    if value in (None, ""):
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, "Invalid as_of date. Please use YYYY-MM-DD.") from None
+
+
+def _parse_allotment(value) -> float:
+    try:
+        allotment_oz = float(value)
+    except (TypeError, ValueError):
+        allotment_oz = float("nan")
+    if not math.isfinite(allotment_oz):
+        raise HTTPError(400, "Allotment must be a number.")
+    return allotment_oz
+
+
+class PlanServer:
+    """
+    Routes HTTP requests to the calculator and keeps per-endpoint latency histograms.
+    """
+    def __init__(self):
+        self.routes = {
+            ("GET", "/plan"): self.handle_plan,
+            ("POST", "/plan/batch"): self.handle_batch,
+            ("GET", "/stats"): self.handle_stats,
+            ("GET", "/metrics"): self.handle_metrics,
+            ("GET", "/health"): self.handle_health,
+        }
+        self.latency = {path: LatencyHistogram() for _, path in self.routes}
+        self.offloaded_routes = {("POST", "/plan/batch")}
+        self._batch_executor = None # Created on the first batch
+        self.started = time.time()
+        self.connections = 0
+
+    # --- Handlers: return (status, payload) ---
+
+    def handle_plan(self, query: dict, body: bytes):
+        allotment_oz = _parse_allotment(query.get("allotment_oz"))
+        start_date = query.get("start_date", "")
+        as_of = _parse_as_of(query.get("as_of"))
+        rule_set = query.get("rule_set", DEFAULT_RULE_SET)
+        try:
+            return 200, plan_cycle(allotment_oz, start_date, as_of, rule_set).to_dict()
+        except ValueError as e:
+            raise HTTPError(400, str(e)) from None
+
+    def handle_batch(self, query: dict, body: bytes):
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Request body must be JSON.") from None
+        if not isinstance(request, dict) or not isinstance(request.get("patients"), list):
+            raise HTTPError(400, "Request body must have a 'patients' list.")
+        patients = request["patients"]
+        if len(patients) > MAX_BATCH_SIZE:
+            raise HTTPError(413, f"Batches are limited to {MAX_BATCH_SIZE:,} patients.")
+
+        as_of = _parse_as_of(request.get("as_of")) or datetime.date.today()
+        batch_rule_set = request.get("rule_set", DEFAULT_RULE_SET)
+        plans = []
+        for patient in patients:
+            if not isinstance(patient, dict):
+                plans.append({"error": "Each patient must be an object."})
+                continue
+            try:
+                allotment_oz = _parse_allotment(patient.get("allotment_oz"))
+            except HTTPError as e:
+                plan = {"error": str(e)}
+            else:
+                plan = calculate_purchase_for_cycle(allotment_oz, str(patient.get("start_date", "")), as_of,
+                                                    str(patient.get("rule_set", batch_rule_set)))
+            if "patient_id" in patient:
+                plan = {"patient_id": patient["patient_id"], **plan}
+            plans.append(plan)
+        return 200, {"as_of": as_of.isoformat(), "plans": plans}
+
+    def handle_stats(self, query: dict, body: bytes):
+        return 200, {
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "open_connections": self.connections,
+            "latency": {path: histogram.snapshot() for path, histogram in self.latency.items()},
+        }
+
+    def handle_metrics(self, query: dict, body: bytes):
+        metrics = reup_metrics.active
+        if metrics is None:
+            raise HTTPError(404, "Metrics are disabled; start the service with --metrics.")
+        if query.get("format") == "json":
+            return 200, metrics.snapshot()
+        return 200, metrics.prometheus_text()
+
+    def handle_health(self, query: dict, body: bytes):
+        return 200, {"status": "ok"}
+
+    # --- HTTP plumbing ---
+
+    def dispatch(self, method: str, target: str, body: bytes):
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                raise HTTPError(405, f"{method} is not allowed on {url.path}.")
+            raise HTTPError(404, f"No such endpoint: {url.path}")
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        started = time.perf_counter()
+        try:
+            return handler(query, body)
+        finally:
+            self.latency[url.path].record(time.perf_counter() - started)
+
+    def _dispatch_encoded(self, method: str, target: str, body: bytes):
+        """dispatch, with the payload already encoded as JSON bytes."""
+        status, payload = self.dispatch(method, target, body)
+        plans = payload.get("plans") if isinstance(payload, dict) else None
+        if not isinstance(plans, list):
+            return status, json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        # json.dumps holds the GIL for the whole call, which would stall the event
+        # loop for a large batch; encoding plan by plan lets it run in between.
+        head = json.dumps({key: value for key, value in payload.items() if key != "plans"}, separators=(",", ":"))
+        encoded = ",".join(json.dumps(plan, separators=(",", ":")) for plan in plans)
+        return status, f'{head[:-1]}{"," if len(head) > 2 else ""}"plans":[{encoded}]}}'.encode("utf-8")
+
+    async def dispatch_async(self, method: str, target: str, body: bytes):
+        """
+        Runs dispatch on the event loop, or on the batch workers for offloaded routes.
+
+        Offloaded routes return their payload as encoded JSON bytes.
+        """
+        if (method, target.partition("?")[0]) not in self.offloaded_routes:
+            return self.dispatch(method, target, body)
+        if self._batch_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="reup-batch")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._batch_executor, self._dispatch_encoded, method, target, body)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT_SECONDS)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                        ConnectionError):
+                    return
+
+                keep_alive = False
+                try:
+                    method, target, version, headers = self._parse_head(head)
+                    keep_alive = self._wants_keep_alive(version, headers)
+                    length = int(headers.get("content-length", "0") or 0)
+                    if length > MAX_BODY_BYTES:
+                        keep_alive = False
+                        raise HTTPError(413, "Request body too large.")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch_async(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except ValueError:
+                    status, payload, keep_alive = 400, {"error": "Malformed request."}, False
+                except asyncio.IncompleteReadError:
+                    return
+                except Exception as e:  # Keep serving other requests if one handler fails.
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    @staticmethod
+    def _parse_head(head: bytes):
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, version = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+        return method.upper(), target, version.upper(), headers
+
+    @staticmethod
+    def _wants_keep_alive(version: str, headers: dict) -> bool:
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    @staticmethod
+    def _response(status: int, payload, keep_alive: bool) -> bytes:
+        if isinstance(payload, str):  # Plain text, e.g. Prometheus metrics
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        elif isinstance(payload, bytes):  # JSON encoded by a batch worker
+            body, content_type = payload, "application/json"
+        else:
+            body, content_type = json.dumps(payload, separators=(",", ":")).encode("utf-8"), "application/json"
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        return head.encode("latin-1") + body
+
+
+async def start_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, plan_server: PlanServer = None):
+    """
+    Starts listening and returns (asyncio.Server, PlanServer) without blocking.
+
+    Pass port=0 to bind a free port; read it back from
+    server.sockets[0].getsockname().
+    """
+    plan_server = plan_server or PlanServer()
+    server = await asyncio.start_server(plan_server.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+    return server, plan_server
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    server, _ = await start_server(host, port)
+    address = server.sockets[0].getsockname()
+    print(f"ReUp planning service listening on http://{address[0]}:{address[1]}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ReUp local HTTP planning service.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Interface to bind (default {DEFAULT_HOST}).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to bind (default {DEFAULT_PORT}).")
+    parser.add_argument("--metrics", action="store_true", help="Record planning metrics and serve them on /metrics.")
+    args = parser.parse_args(argv)
+    if args.metrics:
+        reup_metrics.enable()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+ReUp: Embedded storage for patient profiles, purchases and app settings
+
+A single SQLite file replaces the old whole-file config.json rewrite. SQLite
+commits are atomic and survive crashes, lookups go through primary keys and
+indexes, and bulk writes are batched into one transaction each, so a store
+holding millions of profiles still opens and answers queries in milliseconds.
+
+The desktop app keeps its settings here, and bulk tooling reads and writes
+profiles and purchases through the same PatientStore class.
+"""
+import datetime
+import itertools
+import math
+import os
+import sqlite3
+
+from reup_calculator import parse_start_date
+from reup_ledger import PurchaseLedger
+
+DEFAULT_DB_PATH = "reup.db"
+DEFAULT_BATCH_SIZE = 10_000
+SCHEMA_VERSION = 1
+CACHE_SIZE_KIB = 64 * 1024  # Page cache per connection; keeps index pages hot during bulk writes
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    patient_id   TEXT PRIMARY KEY,
+    allotment_oz REAL NOT NULL,
+    start_date   TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS purchases (
+    id         INTEGER PRIMARY KEY,
+    patient_id TEXT NOT NULL,
+    day        TEXT NOT NULL,
+    grams      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS purchases_by_patient_day ON purchases (patient_id, day);
+
+CREATE TABLE IF NOT EXISTS settings (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+) WITHOUT ROWID;
+"""
+
+
+def _batches(rows, batch_size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _iso_day(day) -> str:
+    """Normalises a date or 'YYYY-MM-DD' string to a zero-padded ISO string."""
+    if isinstance(day, datetime.date):
+        return day.isoformat()
+    return parse_start_date(day).isoformat()
+
+
+def _profile_row(patient_id, allotment_oz, start_date):
+    allotment_oz = float(allotment_oz)
+    if not math.isfinite(allotment_oz) or allotment_oz <= 0:
+        raise ValueError("Allotment must be a positive number.")
+    return str(patient_id), allotment_oz, _iso_day(start_date)
+
+
+def _purchase_row(patient_id, day, grams):
+    grams = float(grams)
+    if not math.isfinite(grams) or grams <= 0:
+        raise ValueError("Purchase amount must be a positive number of grams.")
+    return str(patient_id), _iso_day(day), grams
+
+
+class PatientStore:
+    """
+    A SQLite-backed store of patient profiles, purchases and app settings.
+
+    Every write method runs in its own transaction: it either commits fully or
+    leaves the store untouched. Bulk methods take any iterable and write it in
+    batches of `batch_size` rows, each batch in one executemany call.
+    """
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KIB}")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    # --- Profiles ---
+
+    def get_profile(self, patient_id):
+        """Returns {"patient_id", "allotment_oz", "start_date"} or None."""
+        row = self._conn.execute(
+            "SELECT patient_id, allotment_oz, start_date FROM profiles WHERE patient_id = ?",
+            (str(patient_id),)).fetchone()
+        if row is None:
+            return None
+        return {"patient_id": row[0], "allotment_oz": row[1], "start_date": row[2]}
+
+    def save_profile(self, patient_id, allotment_oz: float, start_date):
+        """Adds or replaces one profile. Raises ValueError on invalid values."""
+        self.save_profiles([(patient_id, allotment_oz, start_date)])
+
+    def save_profiles(self, profiles, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Adds or replaces (patient_id, allotment_oz, start_date) profiles in one transaction.
+
+        Every row is validated before it is written; if any row is invalid the
+        whole call is rolled back and ValueError is raised.
+
+        Returns:
+            The number of profiles written.
+        """
+        written = 0
+        with self._conn:
+            for batch in _batches((_profile_row(*profile) for profile in profiles), batch_size):
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO profiles (patient_id, allotment_oz, start_date) VALUES (?, ?, ?)",
+                    batch)
+                written += len(batch)
+        return written
+
+    def delete_profile(self, patient_id):
+        """Removes a profile and its purchases."""
+        with self._conn:
+            self._conn.execute("DELETE FROM purchases WHERE patient_id = ?", (str(patient_id),))
+            self._conn.execute("DELETE FROM profiles WHERE patient_id = ?", (str(patient_id),))
+
+    def profile_count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def iter_profiles(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        """Yields (patient_id, allotment_oz, start_date) tuples in patient_id order."""
+        cursor = self._conn.execute("SELECT patient_id, allotment_oz, start_date FROM profiles ORDER BY patient_id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+    # --- Purchases ---
+
+    def record_purchase(self, patient_id, day, grams: float):
+        self.record_purchases([(patient_id, day, grams)])
+
+    def record_purchases(self, purchases, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Appends (patient_id, day, grams) purchases in one transaction.
+
+        Returns:
+            The number of purchases written.
+        """
+        written = 0
+        with self._conn:
+            for batch in _batches((_purchase_row(*purchase) for purchase in purchases), batch_size):
+                self._conn.executemany("INSERT INTO purchases (patient_id, day, grams) VALUES (?, ?, ?)", batch)
+                written += len(batch)
+        return written
+
+    def purchases(self, patient_id, first_day=None, last_day=None):
+        """Returns a patient's (day, grams) purchases in date order, optionally within a date range."""
+        query = "SELECT day, grams FROM purchases WHERE patient_id = ?"
+        params = [str(patient_id)]
+        if first_day is not None:
+            query += " AND day >= ?"
+            params.append(_iso_day(first_day))
+        if last_day is not None:
+            query += " AND day <= ?"
+            params.append(_iso_day(last_day))
+        return self._conn.execute(query + " ORDER BY day, id", params).fetchall()
+
+    def load_ledger(self, patient_ids=None) -> PurchaseLedger:
+        """
+        Builds a PurchaseLedger from stored profiles and purchases.
+
+        Args:
+            patient_ids: Patients to load; defaults to every profile in the store.
+        """
+        ledger = PurchaseLedger()
+        if patient_ids is None:
+            for patient_id, allotment_oz, _ in self.iter_profiles():
+                ledger.set_allotment(patient_id, allotment_oz)
+            rows = self._conn.execute("SELECT patient_id, day, grams FROM purchases ORDER BY patient_id, day, id")
+            for patient_id, purchases in itertools.groupby(rows, key=lambda row: row[0]):
+                if patient_id in ledger:
+                    ledger.record_purchases(patient_id, ((day, grams) for _, day, grams in purchases))
+            return ledger
+
+        for patient_id in patient_ids:
+            profile = self.get_profile(patient_id)
+            if profile is None:
+                raise KeyError(f"Unknown patient: {patient_id!r}")
+            ledger.set_allotment(profile["patient_id"], profile["allotment_oz"])
+            ledger.record_purchases(profile["patient_id"], self.purchases(patient_id))
+        return ledger
+
+    # --- App settings ---
+
+    def get_settings(self) -> dict:
+        return dict(self._conn.execute("SELECT key, value FROM settings"))
+
+    def save_settings(self, settings: dict):
+        """Writes every key in `settings` atomically, leaving other keys untouched."""
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                                   [(str(key), None if value is None else str(value)) for key, value in settings.items()])
+
+    def import_legacy_config(self, config_path: str = "config.json") -> bool:
+        """
+        Copies settings from an old config.json into the store, once.
+
+        Nothing is imported when the store already has settings or the file
+        is missing or unreadable.
+
+        Returns:
+            True if settings were imported.
+        """
+        if self.get_settings() or not os.path.exists(config_path):
+            return False
+        import json # Only needed for this one-time migration; keeps it off the app's startup path
+        try:
+            with open(config_path, "r") as f:
+                config = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        if not isinstance(config, dict):
+            return False
+        self.save_settings(config)
+        return True
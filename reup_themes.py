@@ -0,0 +1,109 @@
+"""
+ReUp: Theme registry for the desktop app
+
+Every theme's ttk styles are configured once, under names prefixed with the
+theme ("dark.TLabel", "dark.Link.TLabel", ...). Switching themes then only
+points each widget at its style for the new theme, instead of switching the
+ttk theme and reconfiguring every style, which redraws the whole window.
+
+Widgets pick a role through their style name: a plain ttk.Label has the role
+"TLabel", and ttk.Label(..., style="Link.TLabel") has the role "Link.TLabel".
+Adding a theme is adding a palette to THEMES.
+"""
+from tkinter import ttk
+
+BASE_TTK_THEME = "clam" # A ttk theme that allows for more customization
+
+# Palettes; each needs every key used in ThemeRegistry._register.
+# "icon" is shown on the theme button while the theme is active.
+THEMES = {
+    "light": {
+        "bg": "#F0F0F0", "fg": "black", "entry_bg": "white", "tree_bg": "white", "tree_fg": "black",
+        "highlight": "lightblue", "highlight_fg": "black", "link_fg": "blue", "error_fg": "#C62828",
+        "muted_fg": "grey", "icon": "\u263D"
+    },
+    "dark": {
+        "bg": "#2E2E2E", "fg": "white", "entry_bg": "#555555", "tree_bg": "#3C3C3C", "tree_fg": "white",
+        "highlight": "#00405A", "highlight_fg": "white", "link_fg": "#58A6FF", "error_fg": "#FF8A80",
+        "muted_fg": "grey", "icon": "\u25D1"
+    },
+    "high_contrast": {
+        "bg": "black", "fg": "white", "entry_bg": "black", "tree_bg": "black", "tree_fg": "white",
+        "highlight": "#1AEBFF", "highlight_fg": "black", "link_fg": "#FFFF00", "error_fg": "#FF6E6E",
+        "muted_fg": "#C0C0C0", "icon": "\u263C"
+    }
+}
+DEFAULT_THEME = "light"
+
+
+class ThemeRegistry:
+    """
+    Registers the ttk styles of every theme once and switches widgets between them.
+
+    Creating a registry selects BASE_TTK_THEME. The registered styles belong
+    to that ttk theme, so nothing else should switch themes afterwards.
+    """
+    def __init__(self, root, themes: dict = THEMES):
+        self.root = root
+        self.themes = themes
+        self.style = ttk.Style(root)
+        self.style.theme_use(BASE_TTK_THEME)
+        for name, colors in themes.items():
+            self._register(name, colors)
+
+    def __contains__(self, name):
+        return name in self.themes
+
+    def names(self) -> list:
+        return list(self.themes)
+
+    def next_theme(self, name: str) -> str:
+        """Returns the theme after `name`, wrapping around; used by the theme button."""
+        names = self.names()
+        return names[(names.index(name) + 1) % len(names)] if name in self.themes else names[0]
+
+    def style_name(self, theme: str, role: str) -> str:
+        return f"{theme}.{role}"
+
+    def apply(self, widget, theme: str):
+        """Points `widget` and every ttk widget inside it at `theme`'s styles."""
+        pending = [widget]
+        while pending:
+            current = pending.pop()
+            if isinstance(current, ttk.Widget):
+                role = self._role(current)
+                current.configure(style=self.style_name(theme, role))
+            pending.extend(current.winfo_children())
+
+    def _role(self, widget) -> str:
+        style_name = str(widget.cget("style"))
+        if not style_name:
+            return widget.winfo_class()
+        prefix, _, role = style_name.partition(".")
+        return role if prefix in self.themes else style_name
+
+    def _register(self, name: str, colors: dict):
+        style = self.style
+        s = lambda role: self.style_name(name, role)
+
+        style.configure(s("TFrame"), background=colors["bg"])
+        style.configure(s("TLabel"), background=colors["bg"], foreground=colors["fg"])
+        style.configure(s("Link.TLabel"), background=colors["bg"], foreground=colors["link_fg"])
+        style.configure(s("Error.TLabel"), background=colors["bg"], foreground=colors["error_fg"])
+        style.configure(s("Muted.TLabel"), background=colors["bg"], foreground=colors["muted_fg"])
+        style.configure(s("TLabelframe"), background=colors["bg"], bordercolor=colors["fg"])
+        style.configure(s("TLabelframe.Label"), background=colors["bg"], foreground=colors["fg"])
+        style.configure(s("TCheckbutton"), background=colors["bg"], foreground=colors["fg"])
+        style.map(s("TCheckbutton"), background=[('active', colors["bg"])])
+
+        style.configure(s("TEntry"), fieldbackground=colors["entry_bg"], foreground=colors["fg"],
+                        insertcolor=colors["fg"], borderwidth=0)
+        style.configure(s("TButton"), foreground=colors["fg"], background=colors["entry_bg"], borderwidth=0)
+        style.map(s("TButton"), background=[('active', colors["highlight"])],
+                  foreground=[('active', colors["highlight_fg"])])
+        style.configure(s("TCombobox"), foreground=colors["fg"])
+        style.map(s("TCombobox"), fieldbackground=[('readonly', colors["entry_bg"])],
+                  selectbackground=[('readonly', colors["entry_bg"])], selectforeground=[('readonly', colors["fg"])])
+
+        style.configure(s("Treeview"), background=colors["tree_bg"], fieldbackground=colors["tree_bg"],
+                        foreground=colors["tree_fg"])